@@ -1,303 +1,73 @@
-import os
-import re
-import smtplib
-import unicodedata
-from datetime import datetime, timedelta
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import List, Tuple, Dict
-
-import requests
-from bs4 import BeautifulSoup
-import cyrtranslit
+import sys
+from typing import List, Tuple, Dict, Optional
+
+from epsbvk.config import load_config
+from epsbvk.engine import run_tenants
+from epsbvk.mailer import send_email
+from epsbvk.matcher import StreetMatcher, match_snapshot
+from epsbvk.normalize import norm_text, strip_diacritics, tolatin
+from epsbvk.reports import build_html_body, build_subject, build_text_body
+from epsbvk.sources import (
+    BVK_URL, EPS_URLS, Snapshot, fetch_bvk_items, load_eps_data, take_snapshot,
+)
+from epsbvk.watch import watch
+
+# ===== JAVNI INTERFEJS =====
+# imena koja je stari skript definisao — ponovo izvezena radi postojećih uvoza
+__all__ = [
+    "TENANT",
+    "STREETS",
+    "search_eps_hits",
+    "match_streets",
+    "search_bvk_hits",
+    "run",
+    "send_email",
+    "norm_text",
+    "strip_diacritics",
+    "tolatin",
+    "build_html_body",
+    "build_subject",
+    "build_text_body",
+    "BVK_URL",
+    "EPS_URLS",
+    "fetch_bvk_items",
+    "load_eps_data",
+]
 
 # ===== KONFIGURACIJA =====
-EPS_URLS = {
-    "danas": "https://elektrodistribucija.rs/planirana-iskljucenja-beograd/Dan_0_Iskljucenja.htm",
-    "sutra": "https://elektrodistribucija.rs/planirana-iskljucenja-beograd/Dan_1_Iskljucenja.htm",
-}
-BVK_URL = "https://www.bvk.rs/kvarovi-na-mrezi/#toggle-id-1"
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                  "AppleWebKit/537.36 (KHTML, like Gecko) "
-                  "Chrome/124.0.0.0 Safari/537.36"
-}
-
-TIMEOUT = 20
-
-# ===== POMOĆNE FUNKCIJE =====
-def strip_diacritics(s: str) -> str:
-    norm = unicodedata.normalize("NFD", s)
-    return "".join(ch for ch in norm if unicodedata.category(ch) != "Mn")
-
-def tolatin(s: str) -> str:
-    table = str.maketrans({
-        "А":"A","Б":"B","В":"V","Г":"G","Д":"D","Ђ":"Dj","Е":"E","Ж":"Z","З":"Z","И":"I","Ј":"J","К":"K",
-        "Л":"L","Љ":"Lj","М":"M","Н":"N","Њ":"Nj","О":"O","П":"P","Р":"R","С":"S","Т":"T","Ћ":"C","У":"U",
-        "Ф":"F","Х":"H","Ц":"C","Ч":"C","Џ":"Dz","Ш":"S",
-        "а":"a","б":"b","в":"v","г":"g","д":"d","ђ":"dj","е":"e","ж":"z","з":"z","и":"i","ј":"j","к":"k",
-        "л":"l","љ":"lj","м":"m","н":"n","њ":"nj","о":"o","п":"p","р":"r","с":"s","т":"t","ћ":"c","у":"u",
-        "ф":"f","х":"h","ц":"c","ч":"c","џ":"dz","ш":"s",
-    })
-    return s.translate(table)
-
-def norm_text(s: str) -> str:
-    s = tolatin(s)
-    s = strip_diacritics(s)
-    s = s.lower()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+# ulice su u config.json (tenant "eps"); ovaj skript je tanak omotač oko engine-a
+TENANT = "eps"
+STREETS = [s for streets in load_config().tenant(TENANT).clusters.values() for s in streets]
 
 # ===== EPS STRUJA =====
-def load_eps_data(url: str):
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-        resp.encoding = "utf-8"
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        tables = soup.find_all("table")
-        if len(tables) < 2:
-            return []
-
-        rows = tables[1].find_all("tr")
-        data = []
-        for row in rows[1:]:
-            cols = row.find_all("td")
-            if len(cols) == 3:
-                opstina = cols[0].get_text(strip=True)
-                vreme = cols[1].get_text(strip=True)
-                ulice = cols[2].get_text(" ", strip=True)
-                data.append((opstina, vreme, ulice))
-        return data
-    except Exception as e:
-        print(f"⚠️ EPS greška: {e}")
-        return []
-
-def search_eps_hits(query: str) -> List[Dict[str, str]]:
-    if all("a" <= ch.lower() <= "z" or ch.isspace() for ch in query):
-        target = cyrtranslit.to_cyrillic(query, "sr")
-    else:
-        target = query
-
-    hits = []
-    for day, url in EPS_URLS.items():
-        data = load_eps_data(url)
-        for opstina, vreme, ulice in data:
-            if target.upper() in ulice.upper():
-                if day == "danas":
-                    datum = datetime.now().strftime("%Y-%m-%d")
-                else:
-                    datum = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-                hits.append({
-                    "day": day,
-                    "date": datum,
-                    "opstina": opstina,
-                    "vreme": vreme,
-                    "ulice": ulice,
-                    "url": url,
-                    "query": query
-                })
-    return hits
+def search_eps_hits(query: str, snapshot: Optional[Snapshot] = None) -> List[Dict[str, str]]:
+    if snapshot is None:
+        snapshot = take_snapshot()
+    results = match_snapshot(snapshot, StreetMatcher({query: [query]}))
+    return [dict(h, query=query) for h in results[query]["eps"]]
 
 # ===== BVK VODA =====
-def fetch_bvk_items(url: str) -> List[str]:
-    resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    all_lis = [li.get_text(" ", strip=True) for li in soup.find_all("li")]
-    items = []
-    for li_text in all_lis:
-        if "Распоред аутоцистерни" in li_text or "Raspored autocisterni" in li_text:
-            break
-        if any(bad in li_text.lower() for bad in ["share", "facebook", "twitter", "whatsapp"]):
-            continue
-        items.append(li_text)
-
-    if not items:
-        text = soup.get_text("\n", strip=True)
-        m = re.search(r"(Без воде су.*?)(Рaspored аутоцистерни|$)", text, flags=re.S | re.I)
-        if m:
-            for line in m.group(1).splitlines():
-                line = line.strip("•*- \t")
-                if len(line) > 3:
-                    items.append(line)
-    return items
-
 def match_streets(items: List[str], targets: List[str]) -> List[Tuple[str, str]]:
-    norm_targets = [norm_text(t) for t in targets]
+    matcher = StreetMatcher({"": targets})
     hits = []
     for raw in items:
-        nline = norm_text(raw)
-        for tgt_raw, tgt in zip(targets, norm_targets):
-            if tgt and tgt in nline:
-                hits.append((tgt_raw, raw))
-    unique = []
-    seen = set()
-    for k in hits:
-        if k not in seen:
-            seen.add(k)
-            unique.append(k)
-    return unique
+        for _cluster, street in matcher.find(raw):
+            hits.append((street, raw))
+    return list(dict.fromkeys(hits))
 
-def search_bvk_hits(query: str) -> List[str]:
-    items = fetch_bvk_items(BVK_URL)
+def search_bvk_hits(query: str, snapshot: Optional[Snapshot] = None) -> List[str]:
+    items = snapshot.bvk if snapshot is not None else fetch_bvk_items(BVK_URL)
     hits = match_streets(items, [query])
     return [raw for (_street, raw) in hits]
 
-# ===== EMAIL (HTML + TXT) =====
-def build_subject(eps_hits: List[Dict[str, str]], bvk_hits: List[str]) -> str:
-    has_eps = len(eps_hits) > 0
-    has_bvk = len(bvk_hits) > 0
-    today = datetime.now().strftime("%Y-%m-%d")
-
-    if not has_eps and not has_bvk:
-        return f"🎉 Danas {today}: nema problema sa strujom ni vodom — sve radi!"
-    if has_eps and has_bvk:
-        return f"⚡🚰 Danas {today}: isključenja struje + problemi sa vodom"
-    if has_eps and not has_bvk:
-        return f"⚡ Danas {today}: planirana isključenja struje"
-    return f"🚰 Danas {today}: kvarovi / obaveštenja o vodi"
-
-def build_html_body(eps_hits: List[Dict[str, str]], bvk_hits: List[str], streets: List[str]) -> str:
-    header_joke = "☕ Ako danas nestane struje — bar neće kofeina. 🙂"
-    if not eps_hits and not bvk_hits:
-        header_joke = "🎊 Sve radi! Idealno vreme da uključimo mašinu za veš *i* espreso."
-
-    html = [f"""\
-<!doctype html>
-<html>
-  <head><meta charset="utf-8"><meta name="color-scheme" content="dark light"></head>
-  <body style="font-family:Arial, sans-serif; background:#0b0f14; color:#e6edf3; padding:24px;">
-    <div style="background:#111826; border:1px solid #1f2a37; border-radius:14px; padding:20px; margin-bottom:16px; color:#e6edf3;">
-      <div style="font-size:18px; font-weight:600; margin-bottom:6px;">📬 EPS/BVK dnevni izveštaj</div>
-      <div style="opacity:.8; font-size:12px;">{datetime.now().strftime("%A, %d.%m.%Y.")} — Ulice posmatranja: {" • ".join(streets)}</div>
-      <div style="margin-top:10px; font-size:12px; opacity:.8;">{header_joke}</div>
-    </div>
-"""]
-
-    if eps_hits:
-        html.append('<div style="display:inline-block; padding:6px 10px; border-radius:999px; font-size:12px; margin-right:8px; border:1px solid #5b2121; background:#1a0e0e; color:#f97373;">⚡ Struja: pogodjene ulice</div>')
-    else:
-        html.append('<div style="display:inline-block; padding:6px 10px; border-radius:999px; font-size:12px; margin-right:8px; border:1px solid #1f513f; background:#0e1c16; color:#34d399;">⚡ Struja: bez planiranih isključenja</div>')
-    if bvk_hits:
-        html.append('<div style="display:inline-block; padding:6px 10px; border-radius:999px; font-size:12px; margin-right:8px; border:1px solid #5a441a; background:#1a150a; color:#f59e0b;">🚰 Voda: prijavljeni radovi/kvarovi</div>')
-    else:
-        html.append('<div style="display:inline-block; padding:6px 10px; border-radius:999px; font-size:12px; margin-right:8px; border:1px solid #1f513f; background:#0e1c16; color:#34d399;">🚰 Voda: nema prijavljenih problema</div>')
-    html.append("<br><br>")
-
-    # EPS
-    html.append('<div style="background:#111826; border:1px solid #1f2a37; border-radius:14px; padding:20px; margin-bottom:16px; color:#e6edf3;">')
-    html.append('<div style="font-weight:600;margin-bottom:6px;">⚡ EPS (struja)</div>')
-    if eps_hits:
-        for h in eps_hits:
-            html.append(f"""
-              <div style="background:#1a2432; border:1px solid #243244; border-radius:12px; padding:14px; margin-bottom:12px; color:#e6edf3;">
-                <div style="margin-bottom:6px;">
-                  <span style="display:inline-block; font-size:12px; padding:5px 10px; border-radius:999px; background:#243244; color:#e6edf3; margin:2px 6px 2px 0;">{'DANAS' if h['day']=='danas' else 'SUTRA'} • {h['date']}</span>
-                  <span style="display:inline-block; font-size:12px; padding:5px 10px; border-radius:999px; background:#243244; color:#e6edf3; margin:2px 6px 2px 0;">Opština: {h['opstina']}</span>
-                </div>
-                <div><strong>Vreme:</strong> {h['vreme']}</div>
-                <div style="margin-top:6px;"><strong>Ulice:</strong> {h['ulice']}</div>
-                <div style="font-size:12px; opacity:.8; margin-top:8px;">Izvor: <a href="{h['url']}" style="color:#93c5fd;">{h['url']}</a></div>
-              </div>
-            """)
-        html.append('<div style="font-size:12px; opacity:.8; margin-top:8px;">Tip: napunite baterije i skuvajte kafu unapred. ☕🔋</div>')
-    else:
-        html.append('<div>✅ Nema planiranih isključenja za tražene ulice.</div>')
-    html.append("</div>")
-
-    # BVK
-    html.append('<div style="background:#111826; border:1px solid #1f2a37; border-radius:14px; padding:20px; margin-bottom:16px; color:#e6edf3;">')
-    html.append('<div style="font-weight:600;margin-bottom:6px;">🚰 BVK (voda)</div>')
-    if bvk_hits:
-        html.append('<ul style="margin:0; padding-left:18px;">')
-        for raw in bvk_hits:
-            html.append(f'<li>{raw}</li>')
-        html.append('</ul>')
-        html.append(f'<div style="font-size:12px; opacity:.8; margin-top:8px;">Izvor: <a href="{BVK_URL}" style="color:#93c5fd;">{BVK_URL}</a></div>')
-        html.append('<div style="font-size:12px; opacity:.8; margin-top:8px;">Tip: napunite bokale — za svaki slučaj. 💧</div>')
-    else:
-        html.append('<div>✅ Nema prijavljenih isključenja/kvarova vode za tražene ulice.</div>')
-    html.append("</div>")
-
-    html.append("""</body></html>""")
-    return "".join(html)
-
-def build_text_body(eps_hits: List[Dict[str, str]], bvk_hits: List[str], streets: List[str]) -> str:
-    lines = []
-    lines.append(f"EPS/BVK dnevni izveštaj — {datetime.now().strftime('%A, %d.%m.%Y.')}")
-    lines.append(f"Ulice posmatranja: {', '.join(streets)}")
-    lines.append("")
-    lines.append("⚡ EPS (struja)")
-    if eps_hits:
-        for h in eps_hits:
-            when = "DANAS" if h["day"] == "danas" else "SUTRA"
-            lines.append(f"• {when} ({h['date']}): {h['opstina']} | {h['vreme']} | {h['ulice']} (izvor: {h['url']})")
-    else:
-        lines.append("• Nema planiranih isključenja za tražene ulice.")
-    lines.append("")
-    lines.append("🚰 BVK (voda)")
-    if bvk_hits:
-        for raw in bvk_hits:
-            lines.append(f"• {raw} (izvor: {BVK_URL})")
-    else:
-        lines.append("• Nema prijavljenih isključenja/kvarova vode za tražene ulice.")
-    lines.append("")
-    return "\n".join(lines)
-
-def send_email(subject: str, html_body: str, text_body: str):
-    smtp_host = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    smtp_port = int(os.getenv("SMTP_PORT", "587"))
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASS")
-    email_to = os.getenv("EMAIL_TO")
-
-    if not all([smtp_user, smtp_pass, email_to]):
-        print("⚠️ Nedostaju SMTP kredencijali.")
-        return
-
-    msg = MIMEMultipart("alternative")
-    msg["From"] = smtp_user
-    msg["To"] = email_to
-    msg["Subject"] = subject
-
-    part_text = MIMEText(text_body, "plain", "utf-8")
-    part_html = MIMEText(html_body, "html", "utf-8")
-    msg.attach(part_text)
-    msg.attach(part_html)
-
-    try:
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-        print(f"📧 Email poslat na {email_to} • Subject: {subject}")
-    except Exception as e:
-        print(f"⚠️ Greška pri slanju email-a: {e}")
+# ===== PROVERA =====
+def run(snapshot: Optional[Snapshot] = None) -> None:
+    run_tenants([load_config().tenant(TENANT)], snapshot)
 
 # ===== MAIN =====
 if __name__ == "__main__":
-    streets = ["Sestara", "Nikodima", "Salvadora"]
-
-    eps_hits_all: List[Dict[str, str]] = []
-    bvk_hits_all: List[str] = []
-
-    for street in streets:
-        eps_hits_all.extend(search_eps_hits(street))
-        bvk_hits_all.extend(search_bvk_hits(street))
-
-    # uniq BVK linije
-    bvk_hits_all = list(dict.fromkeys(bvk_hits_all))
-
-    subject = build_subject(eps_hits_all, bvk_hits_all)
-    html_body = build_html_body(eps_hits_all, bvk_hits_all, streets)
-    text_body = build_text_body(eps_hits_all, bvk_hits_all, streets)
-
-    if not eps_hits_all and not bvk_hits_all:
-        print("📭 Nema pogodaka (struja/voda) — email NEĆE biti poslat.")
-        # ništa dalje (po želji: sys.exit(0))
+    # --watch: dugotrajni režim sa adaptivnim intervalima umesto jednog prolaza
+    if "--watch" in sys.argv[1:]:
+        watch(run)
     else:
-        print("✅ Pronađeni rezultati — šaljem email…")
-        send_email(subject, html_body, text_body)
+        run()
@@ -0,0 +1 @@
+# Zajednički delovi za eps_checker.py i apartmani_checker.py
@@ -0,0 +1,88 @@
+import argparse
+import sys
+from typing import List, Optional
+
+# ===== CLI =====
+# python -m epsbvk <komanda>. Ovaj modul uvozi samo argparse; engine,
+# requests, sqlite i ostalo se učitavaju tek u komandi koja ih koristi,
+# pa --help i upiti nad kešom startuju brzo.
+
+def _check(args: argparse.Namespace, rest: List[str]) -> int:
+    from epsbvk.engine import run
+
+    if args.watch:
+        from epsbvk.watch import watch
+
+        watch(run)
+    else:
+        run()
+    return 0
+
+def _print_records(label: str, records: list) -> None:
+    for rec in records:
+        hit = rec["hit"]
+        if rec["source"] == "eps":
+            what = f"{hit['date']} {hit['vreme']} {hit['opstina']}: {hit['match']}"
+        else:
+            what = f"BVK: {hit}"
+        print(f"   {label} [{rec['cluster']}] {what}")
+
+def _diff(args: argparse.Namespace, rest: List[str]) -> int:
+    # šta bi sledeće slanje javilo — bez slanja i bez menjanja stanja
+    from epsbvk.config import load_config
+    from epsbvk.engine import match_tenants
+    from epsbvk.sources import cached_snapshot, take_snapshot
+    from epsbvk.state import StateStore, results_records
+
+    config = load_config()
+    try:
+        tenants = [config.tenant(args.tenant)] if args.tenant else config.active()
+    except KeyError:
+        known = ", ".join(t.name for t in config.tenants) or "-"
+        print(f"❌ Nepoznat tenant „{args.tenant}” (postoje: {known})", file=sys.stderr)
+        return 2
+    snapshot = cached_snapshot() if args.offline else take_snapshot()
+    for tenant, results in match_tenants(tenants, snapshot):
+        d = StateStore(tenant.name).diff(results_records(results), snapshot)
+        print(f"📋 [{tenant.name}] novo {len(d.added)}, izmenjeno {len(d.changed)}, otkazano {len(d.cancelled)}")
+        _print_records("+", d.added)
+        _print_records("~", d.changed)
+        _print_records("-", d.cancelled)
+    return 0
+
+def _query_index(args: argparse.Namespace, rest: List[str]) -> int:
+    from epsbvk.index import main
+
+    return main(rest)
+
+def _bench(args: argparse.Namespace, rest: List[str]) -> int:
+    from epsbvk.bench import main
+
+    return main(rest)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m epsbvk", description="EPS + BVK provera isključenja")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("check", help="preuzmi stranice i pošalji izveštaje")
+    p.add_argument("--watch", action="store_true", help="dugotrajni režim sa adaptivnim intervalima")
+    p.set_defaults(func=_check)
+
+    p = sub.add_parser("diff", help="prikaži šta bi bilo javljeno, bez slanja")
+    p.add_argument("--tenant", help="samo ovaj tenant (podrazumevano svi aktivni)")
+    p.add_argument("--offline", action="store_true", help="poslednji preuzeti podaci iz keša, bez mreže")
+    p.set_defaults(func=_diff)
+
+    # ove komande prosleđuju svoje argumente modulu koji ih parsira
+    p = sub.add_parser("query-index", help="da li je ulica pogođena isključenjem", add_help=False)
+    p.set_defaults(func=_query_index)
+    p = sub.add_parser("bench", help="benchmark faza obrade", add_help=False)
+    p.set_defaults(func=_bench)
+
+    args, rest = ap.parse_known_args(argv)
+    if rest and args.func not in (_query_index, _bench):
+        ap.error(f"nepoznati argumenti: {' '.join(rest)}")
+    return args.func(args, rest)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import argparse
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from epsbvk.index import split_bvk_streets, split_eps_streets
+from epsbvk.matcher import StreetMatcher
+from epsbvk.metrics import METRICS
+from epsbvk.normalize import norm_street
+from epsbvk.sources import Snapshot, day_offset
+from epsbvk.store import json_hash
+
+# ===== ISTORIJSKA ARHIVA ISKLJUČENJA =====
+# Svaki EPS red i BVK stavka idu u SQLite arhivu (samo dodavanje). Isti zapis
+# iz više pokretanja istog dana je jedan red sa brojačem viđenja, a ulice su
+# u zasebnoj tabeli sa indeksima za upite po ulici, opštini i datumu.
+# Prazan EPS_ARCHIVE isključuje arhivu.
+ARCHIVE_PATH = os.getenv("EPS_ARCHIVE", os.path.join(".cache", "archive.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    fetched_at TEXT NOT NULL,
+    digest TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS outages (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    date TEXT NOT NULL,
+    day_offset INTEGER NOT NULL,
+    opstina TEXT NOT NULL,
+    opstina_norm TEXT NOT NULL,
+    vreme TEXT NOT NULL,
+    text TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS outage_streets (
+    outage_id INTEGER NOT NULL REFERENCES outages(id),
+    street TEXT NOT NULL,
+    street_norm TEXT NOT NULL,
+    numbers TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (outage_id, street_norm)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS outages_date ON outages(date);
+CREATE INDEX IF NOT EXISTS outages_opstina_date ON outages(opstina_norm, date);
+CREATE INDEX IF NOT EXISTS streets_norm_date ON outage_streets(street_norm, date);
+"""
+
+# (source, date, day_offset, opstina, vreme, text, [(ulica, brojevi)])
+_Row = Tuple[str, str, int, str, str, str, List[Tuple[str, str]]]
+
+def _rows(snapshot: Snapshot) -> Iterable[_Row]:
+    for day, rows in snapshot.eps.items():
+        datum = snapshot.eps_date(day)
+        offset = day_offset(day)
+        for opstina, vreme, ulice in rows:
+            yield "eps", datum, offset, opstina, vreme, ulice, split_eps_streets(ulice)
+    # BVK stavka nema datum — vodi se pod danom preuzimanja
+    datum = snapshot.fetched_at.strftime("%Y-%m-%d")
+    for raw in snapshot.bvk:
+        opstina, sep, _rest = raw.partition(":")
+        yield "bvk", datum, 0, opstina.strip() if sep else "", "", raw, split_bvk_streets(raw)
+
+class Archive:
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add(self, snapshot: Snapshot) -> int:
+        # vraća broj novih zapisa; isti snapshot (po hešu) se ne upisuje dvaput
+        seen_at = snapshot.fetched_at.isoformat(timespec="seconds")
+        with METRICS.stage("archive") as m, self.db:
+            cur = self.db.execute(
+                "INSERT OR IGNORE INTO runs (fetched_at, digest) VALUES (?, ?)", (seen_at, snapshot.digest))
+            if snapshot.digest is not None and not cur.rowcount:
+                m["added"] = 0
+                return 0
+            added = 0
+            for source, datum, offset, opstina, vreme, text, streets in _rows(snapshot):
+                fp = json_hash([source, datum, opstina, vreme, text])
+                cur = self.db.execute(
+                    "INSERT INTO outages (fingerprint, source, date, day_offset, opstina, opstina_norm,"
+                    " vreme, text, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(fingerprint) DO UPDATE SET last_seen = excluded.last_seen, seen = seen + 1"
+                    " RETURNING id, seen",
+                    (fp, source, datum, offset, opstina, norm_street(opstina), vreme, text, seen_at, seen_at))
+                outage_id, seen = cur.fetchone()
+                if seen > 1:
+                    continue
+                added += 1
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO outage_streets (outage_id, street, street_norm, numbers, date)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(outage_id, s, norm_street(s), n, datum) for s, n in streets if norm_street(s)])
+            m["added"] = added
+        return added
+
+    def query(self, street: Optional[str] = None, opstina: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              source: Optional[str] = None, prefix: bool = False) -> List[Dict[str, Any]]:
+        # datumi su "YYYY-MM-DD", granice uključive
+        where, args = [], []
+        if street:
+            key = norm_street(street)
+            if prefix:
+                where.append("s.street_norm >= ? AND s.street_norm < ?")
+                args += [key, key + "\uffff"]
+            else:
+                where.append("s.street_norm = ?")
+                args.append(key)
+        if opstina:
+            where.append("o.opstina_norm = ?")
+            args.append(norm_street(opstina))
+        if since:
+            where.append("o.date >= ?")
+            args.append(since)
+        if until:
+            where.append("o.date <= ?")
+            args.append(until)
+        if source:
+            where.append("o.source = ?")
+            args.append(source)
+
+        join = "JOIN outage_streets s ON s.outage_id = o.id" if street else ""
+        sql = (f"SELECT DISTINCT o.* FROM outages o {join}"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY o.date, o.id")
+        return [dict(r) for r in self.db.execute(sql, args)]
+
+    def cluster_stats(self, clusters: Dict[str, List[str]], since: Optional[str] = None,
+                      until: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        # ulice klastera se traže istim automatom kao u živoj pretrazi, ali samo
+        # nad različitim imenima ulica iz arhive — sirovi HTML se ne čita ponovo
+        matcher = StreetMatcher(clusters)
+        by_cluster: Dict[str, set] = {c: set() for c in clusters}
+        for (name,) in self.db.execute("SELECT DISTINCT street_norm FROM outage_streets"):
+            for cluster, _street in matcher.find(name):
+                by_cluster[cluster].add(name)
+
+        stats: Dict[str, Dict[str, Any]] = {}
+        for cluster, names in by_cluster.items():
+            s = {"outages": 0, "eps": 0, "bvk": 0, "days": 0, "first": None, "last": None}
+            if names:
+                marks = ",".join("?" * len(names))
+                where = f"s.street_norm IN ({marks})"
+                args: List[Any] = sorted(names)
+                if since:
+                    where += " AND s.date >= ?"
+                    args.append(since)
+                if until:
+                    where += " AND s.date <= ?"
+                    args.append(until)
+                row = self.db.execute(
+                    "SELECT COUNT(DISTINCT o.id), COUNT(DISTINCT CASE WHEN o.source = 'eps' THEN o.id END),"
+                    " COUNT(DISTINCT CASE WHEN o.source = 'bvk' THEN o.id END), COUNT(DISTINCT o.date),"
+                    " MIN(o.date), MAX(o.date)"
+                    f" FROM outage_streets s JOIN outages o ON o.id = s.outage_id WHERE {where}", args).fetchone()
+                s.update(zip(("outages", "eps", "bvk", "days", "first", "last"), row))
+            stats[cluster] = s
+        return stats
+
+def archive_snapshot(snapshot: Snapshot, path: str = ARCHIVE_PATH) -> None:
+    # arhiva ne sme da obori pokretanje — izveštaj je važniji
+    if not path:
+        return
+    try:
+        with Archive(path) as archive:
+            archive.add(snapshot)
+    except sqlite3.Error as e:
+        print(f"⚠️ Arhiva greška: {e}")
+
+# ===== CLI =====
+def main(argv=None) -> None:
+    from epsbvk.config import load_config
+
+    ap = argparse.ArgumentParser(description="Upiti nad istorijskom arhivom isključenja")
+    ap.add_argument("--db", default=ARCHIVE_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    q = sub.add_parser("query", help="isključenja po ulici/opštini/datumu")
+    q.add_argument("--street")
+    q.add_argument("--opstina")
+    q.add_argument("--source", choices=["eps", "bvk"])
+    q.add_argument("--prefix", action="store_true")
+    st = sub.add_parser("stats", help="učestalost isključenja po klasteru")
+    st.add_argument("--tenant", default="apartmani")
+    for p in (q, st):
+        p.add_argument("--since", help="od datuma (YYYY-MM-DD)")
+        # bez gornje granice: arhiva sadrži i najavljena isključenja (sutra, dan2)
+        p.add_argument("--until", help="do datuma (YYYY-MM-DD), podrazumevano bez granice")
+    args = ap.parse_args(argv)
+
+    with Archive(args.db) as archive:
+        if args.cmd == "query":
+            for r in archive.query(args.street, args.opstina, args.since, args.until, args.source, args.prefix):
+                vreme = f" {r['vreme']}" if r["vreme"] else ""
+                print(f"{r['date']}{vreme} [{r['source']}] {r['text']}  (×{r['seen']})")
+        else:
+            config = load_config()
+            try:
+                tenant = config.tenant(args.tenant)
+            except KeyError:
+                ap.error(f"nepoznat tenant: {args.tenant} (postoje: {', '.join(t.name for t in config.tenants) or '-'})")
+            stats = archive.cluster_stats(tenant.clusters, args.since, args.until)
+            for cluster, s in stats.items():
+                print(f"{cluster}: {s['outages']} isključenja (struja {s['eps']}, voda {s['bvk']}), "
+                      f"{s['days']} dana, {s['first'] or '-'} – {s['last'] or '-'}")
+
+if __name__ == "__main__":
+    main()
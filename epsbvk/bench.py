@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from epsbvk.extract import BvkItemsExtractor, EpsTableExtractor, stream_extract
+from epsbvk.fetcher import CHUNK_SIZE
+from epsbvk.fixtures import (
+    read_fixture, synthetic_bvk_html, synthetic_eps_html, synthetic_streets,
+)
+from epsbvk.index import StreetIndex
+from epsbvk.matcher import StreetMatcher, match_snapshot
+from epsbvk.normalize import norm_line, norm_street
+from epsbvk.reports import build_html_body, clear_card_cache
+from epsbvk.sources import EPS_URLS, Snapshot, parse_bvk_html, parse_eps_html
+
+# ===== BENCHMARK =====
+# Faze (parsiranje EPS/BVK, pretraga, renderovanje) nad ručno sastavljenim
+# i generisanim stranicama, bez mreže. Rezultati se mogu sačuvati kao
+# baseline i porediti pre deploy-a:
+#   python -m epsbvk.bench --save
+#   python -m epsbvk.bench --compare
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "bench", "baseline.json")
+
+DEFAULT_ROWS = [100, 1000, 5000]
+DEFAULT_STREETS = [3, 100, 1000, 5000]
+DEFAULT_REPEAT = 15
+# dozvoljeno pogoršanje p50 u odnosu na baseline
+TOLERANCE = 0.25
+# komande čiji se hladan start meri (--cold-start)
+COLD_START = {
+    "cold_start_help": ["--help"],
+    "cold_start_query": ["query-index", "--offline", "Takovska"],
+}
+
+# ===== PROVERA PRETRAGE =====
+# (posmatrana ulica, tekst sa stranice, očekivan pogodak) — brzina ne vredi
+# ako automat promaši ili pogodi pogrešnu ulicu
+MATCH_CASES = [
+    ("Kapetan-Mišina", "КАПЕТАН МИШИНА: 1-5", True),
+    ("Kapetan-Misina", "Kapetan Mišina 4", True),
+    ("Bulevar Despota Stefana", "Бул. деспота Стефана 12", True),
+    ("Bulevar Despota Stefana", "БУЛ.ДЕСПОТА СТЕФАНА: 2", True),
+    ("Bul. kralja Aleksandra", "БУЛЕВАР КРАЉА АЛЕКСАНДРА: 73", True),
+    ("Knez Mihailova", "КНЕЗА МИХАИЛОВА: 1-9", True),
+    ("Ul. Takovska", "Таковска од броја 12 до 20", True),
+    ("Palmotićeva", "ПАЛМОТИЋЕВА: 2", True),
+    # jedna izmena u dužoj reči
+    ("Palmoticeva", "Palmoticva 5", True),
+    ("Strahinjica Bana", "Strahinjic Bana 3", True),
+    ("Bulevar Despota Stefana", "Bulevar Despota Stefna", True),
+    ("Vlajkovićeva", "VLAJKOVICEWA 8", True),
+    ("Gundulićev venac", "Gunduliceev venac 14", True),
+    ("Palmoticeva", "Plmoticva 5", False),
+    # kratke reči i jednorečne ulice ispod granice moraju tačno
+    ("Kosovska", "КОСОВСКЕ ДЕВОЈКЕ: 3", False),
+    ("Strahinjica Bana", "Strahinjica Bane 3", False),
+    ("Bulevar Despota Stefana", "Деспота Стефана", False),
+    ("Takovska", "Таковска 3", True),
+]
+
+def check_matching() -> List[str]:
+    failures = []
+    for street, text, expected in MATCH_CASES:
+        got = bool(StreetMatcher({"": [street]}).find(text))
+        if got != expected:
+            failures.append(f"{street!r} u {text!r}: očekivano {expected}, dobijeno {got}")
+    return failures
+
+# ===== PROVERA STANJA (DIFF) =====
+# (opis, redovi pre, redovi posle, BVK pre, BVK posle, očekivano (novo, izmenjeno, otkazano))
+_ROW = ("Стари град", "08:00 - 12:00", "ТАКОВСКА: 1-9")
+STATE_CASES = [
+    ("isti red", [_ROW], [_ROW], [], [], (0, 0, 0)),
+    ("drugi brojevi", [_ROW], [("Стари град", "08:00 - 12:00", "ТАКОВСКА: 1-15")], [], [], (0, 1, 0)),
+    ("produženo", [_ROW], [("Стари град", "08:00 - 16:00", "ТАКОВСКА: 1-9")], [], [], (0, 1, 0)),
+    ("dva reda iste ulice", [_ROW], [_ROW, ("Стари град", "08:00 - 12:00", "Насеље X: ТАКОВСКА: 40-60")],
+     [], [], (1, 0, 0)),
+    ("otkazano", [_ROW], [], [], [], (0, 0, 1)),
+    ("BVK drugi brojevi", [], [], ["Стари град: Таковска од броја 12 до 20"],
+     ["Стари град: Таковска од броја 12 до 30"], (0, 1, 0)),
+]
+
+def check_state_diff() -> List[str]:
+    import tempfile
+
+    from epsbvk.state import StateStore, results_records
+
+    failures = []
+    matcher = StreetMatcher({"c": ["Takovska"]})
+    for name, before, after, bvk_before, bvk_after, expected in STATE_CASES:
+        with tempfile.TemporaryDirectory() as tmp:
+            state = StateStore("check", tmp)
+            for rows, bvk, commit in ((before, bvk_before, True), (after, bvk_after, False)):
+                snap = Snapshot(eps={"danas": rows}, eps_urls={"danas": "-"}, bvk=bvk)
+                records = results_records(match_snapshot(snap, matcher))
+                if commit:
+                    state.commit(records, snap)
+            d = state.diff(records, snap)
+            got = (len(d.added), len(d.changed), len(d.cancelled))
+            if got != expected:
+                failures.append(f"{name}: očekivano {expected}, dobijeno {got}")
+    return failures
+
+# ===== MERENJE =====
+def _chunks(data: bytes) -> List[bytes]:
+    return [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+def _clear_caches(matcher: Optional[StreetMatcher]) -> None:
+    # svako ponavljanje meri hladne keševe (normalizacija, bliske reči, kartice)
+    norm_line.cache_clear()
+    norm_street.cache_clear()
+    clear_card_cache()
+    if matcher is not None:
+        matcher.clear_cache()
+
+def measure(stage: str, fn: Callable[[], object], units: int, repeat: int,
+            matcher: Optional[StreetMatcher] = None, **params) -> Dict:
+    fn()  # zagrevanje
+    times = []
+    for _ in range(repeat):
+        _clear_caches(matcher)
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    _clear_caches(matcher)
+    tracemalloc.start()
+    fn()
+    _cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return _summary(stage, times, units, peak, **params)
+
+def _summary(stage: str, times: List[float], units: int, peak: int, **params) -> Dict:
+    times = sorted(times)
+    def pct(p: float) -> float:
+        return times[min(len(times) - 1, int(round(p * (len(times) - 1))))] * 1000
+
+    p50 = statistics.median(times)
+    return {
+        "stage": stage,
+        **params,
+        "units": units,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "throughput": round(units / p50, 1) if p50 > 0 else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def measure_cold_start(repeat: int) -> List[Dict]:
+    # svako merenje je novi interpreter: uvoz modula + komanda, bez mreže
+    results = []
+    for stage, args in COLD_START.items():
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-m", "epsbvk", *args], cwd=ROOT,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            times.append(time.perf_counter() - t0)
+        results.append(_summary(stage, times, 1, 0, page="cli"))
+    return results
+
+def run_benchmarks(rows_sizes: List[int], street_sizes: List[int], repeat: int) -> List[Dict]:
+    results = []
+    pages = {"fixture": (read_fixture("Dan_0_Iskljucenja.htm"), read_fixture("bvk.html"))}
+    for rows in rows_sizes:
+        pages[f"synthetic-{rows}"] = (synthetic_eps_html(rows, seed=rows), synthetic_bvk_html(rows, seed=rows))
+
+    for page, (eps_html, bvk_html) in pages.items():
+        eps_bytes, bvk_bytes = eps_html.encode("utf-8"), bvk_html.encode("utf-8")
+        eps_rows = parse_eps_html(eps_html)
+        bvk_items = parse_bvk_html(bvk_html)
+
+        results.append(measure(
+            "load_eps_data", lambda: stream_extract(_chunks(eps_bytes), "utf-8", EpsTableExtractor()),
+            len(eps_rows), repeat, page=page, bytes=len(eps_bytes)))
+        results.append(measure(
+            "fetch_bvk_items", lambda: stream_extract(_chunks(bvk_bytes), "utf-8", BvkItemsExtractor()),
+            len(bvk_items), repeat, page=page, bytes=len(bvk_bytes)))
+
+        snapshot = Snapshot(eps={day: eps_rows for day in EPS_URLS}, eps_urls=dict(EPS_URLS), bvk=bvk_items)
+        results.append(measure(
+            "index_build", lambda: StreetIndex(snapshot),
+            len(eps_rows) * len(snapshot.eps) + len(bvk_items), repeat, page=page))
+        index = StreetIndex(snapshot)
+        for n in street_sizes:
+            streets = synthetic_streets(n)
+            watch = {s: [s] for s in streets}
+            matcher = StreetMatcher(watch)
+
+            results.append(measure("matcher_build", lambda: StreetMatcher(watch), n, repeat, page=page, streets=n))
+            results.append(measure(
+                "match_streets", lambda: [matcher.find(raw) for raw in bvk_items],
+                len(bvk_items), repeat, matcher, page=page, streets=n))
+            results.append(measure(
+                "search_eps_hits", lambda: match_snapshot(snapshot, matcher),
+                len(eps_rows) * len(snapshot.eps), repeat, matcher, page=page, streets=n))
+            results.append(measure(
+                "index_lookup", lambda: [index.lookup(s) for s in streets],
+                n, repeat, page=page, streets=n))
+
+            matched = match_snapshot(snapshot, matcher)
+            eps_hits = [dict(h, query=q) for q, data in matched.items() for h in data["eps"]]
+            bvk_hits = list(dict.fromkeys(raw for data in matched.values() for raw in data["bvk"]))
+            results.append(measure(
+                "build_html_body", lambda: build_html_body(eps_hits, bvk_hits, streets),
+                max(len(eps_hits) + len(bvk_hits), 1), repeat, page=page, streets=n))
+    return results
+
+# ===== IZVEŠTAJ / BASELINE =====
+def _key(r: Dict) -> str:
+    return json.dumps({k: r[k] for k in ("stage", "page", "streets") if k in r}, sort_keys=True)
+
+def print_table(results: List[Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    print(f"{'faza':<16} {'stranica':<16} {'ulice':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} "
+          f"{'jed/s':>12} {'peak KiB':>10}" + ("  Δp50" if baseline else ""))
+    for r in results:
+        line = (f"{r['stage']:<16} {r['page']:<16} {r.get('streets', ''):>6} {r['p50_ms']:>10.3f} "
+                f"{r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['throughput'] or 0:>12.1f} {r['peak_kib']:>10.1f}")
+        if baseline and _key(r) in baseline and baseline[_key(r)]["p50_ms"]:
+            delta = r["p50_ms"] / baseline[_key(r)]["p50_ms"] - 1
+            line += f"  {delta:+.0%}"
+        print(line)
+
+def compare(results: List[Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(_key(r))
+        if base and base["p50_ms"] and r["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{r['stage']} ({r['page']}, ulice={r.get('streets', '-')}): "
+                               f"{base['p50_ms']:.3f} → {r['p50_ms']:.3f} ms")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="EPS/BVK benchmark nad fiksturama")
+    ap.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                    help="veličine sintetičkih stranica (redova / <li> stavki)")
+    ap.add_argument("--streets", type=int, nargs="+", default=DEFAULT_STREETS,
+                    help="veličine liste posmatranih ulica")
+    ap.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    ap.add_argument("--save", nargs="?", const=BASELINE_PATH, help="sačuvaj rezultate kao baseline")
+    ap.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="uporedi sa baseline-om")
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE)
+    ap.add_argument("--cold-start", action="store_true", help="izmeri i hladan start CLI-ja")
+    args = ap.parse_args(argv)
+
+    failures = check_matching() + check_state_diff()
+    if failures:
+        print("❌ Pretraga ulica ili diff stanja ne radi kako treba:")
+        for f in failures:
+            print(f"  - {f}")
+        return 1
+
+    results = run_benchmarks(args.rows, args.streets, args.repeat)
+    if args.cold_start:
+        results += measure_cold_start(args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {_key(r): r for r in json.load(f)["results"]}
+    print_table(results, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                       "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline sačuvan: {args.save}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️ Regresije (> {args.tolerance:.0%}):")
+            for r in regressions:
+                print(f"  - {r}")
+            return 1
+        print("\n✅ Nema regresija u odnosu na baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
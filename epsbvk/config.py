@@ -0,0 +1,66 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# ===== KONFIGURACIJA POSMATRANJA =====
+# config.json drži sve liste posmatranja (tenante): svaki ima svoje
+# primaoce, klastere ulica i vrstu izveštaja.
+CONFIG_PATH = os.getenv(
+    "EPS_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json"),
+)
+
+@dataclass
+class Tenant:
+    name: str
+    clusters: Dict[str, List[str]]
+    report: str = "dnevni"
+    # ime env promenljive sa primaocima (odvojeni zarezom) — adrese nisu u repou
+    recipients_env: str = "EMAIL_TO"
+    enabled: bool = True
+
+    def recipients(self) -> List[str]:
+        return [a.strip() for a in os.getenv(self.recipients_env, "").split(",") if a.strip()]
+
+@dataclass
+class Sources:
+    # region -> osnovni URL stranica (relativan u odnosu na EPS_BASE_URL);
+    # prazno = samo Beograd
+    eps_regions: Dict[str, str] = field(default_factory=dict)
+    # koliko dana unapred (Dan_0 .. Dan_<n-1>) se traži po regionu
+    eps_days: int = 2
+
+@dataclass
+class Config:
+    tenants: List[Tenant] = field(default_factory=list)
+    sources: Sources = field(default_factory=Sources)
+
+    def tenant(self, name: str) -> Tenant:
+        for t in self.tenants:
+            if t.name == name:
+                return t
+        raise KeyError(f"nepoznat tenant: {name}")
+
+    def active(self) -> List[Tenant]:
+        return [t for t in self.tenants if t.enabled]
+
+def _tenant(raw: dict) -> Tenant:
+    clusters = {c: list(streets) for c, streets in raw.get("clusters", {}).items()}
+    # "streets" je skraćenica: svaka ulica je zaseban klaster (upit)
+    for street in raw.get("streets", []):
+        clusters.setdefault(street, [street])
+    return Tenant(
+        name=raw["name"],
+        clusters=clusters,
+        report=raw.get("report", "dnevni"),
+        recipients_env=raw.get("recipients_env", "EMAIL_TO"),
+        enabled=raw.get("enabled", True),
+    )
+
+def load_config(path: str = CONFIG_PATH) -> Config:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    src = raw.get("sources", {})
+    sources = Sources(eps_regions=dict(src.get("eps_regions", {})), eps_days=int(src.get("eps_days", 2)))
+    return Config(tenants=[_tenant(t) for t in raw.get("tenants", [])], sources=sources)
@@ -0,0 +1,94 @@
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from epsbvk.archive import archive_snapshot
+from epsbvk.config import Tenant, load_config
+from epsbvk.mailer import QUEUED, SENT, Message, deliver
+from epsbvk.matcher import StreetMatcher, match_snapshot
+from epsbvk.metrics import METRICS
+from epsbvk.reports import REPORTS, source_status
+from epsbvk.sources import Snapshot, take_snapshot
+from epsbvk.state import DIFF_ENABLED, StateStore, results_records
+from epsbvk.store import default_store
+
+# ===== ENGINE =====
+# Svi tenanti iz config.json dele jedan snapshot i jedan automat ulica;
+# posle jednog prolaza rezultati se dele po tenantu i šalju odvojeno.
+SEP = "\x1f"  # razdvaja tenant i klaster u zajedničkom automatu
+
+def _cluster_id(tenant: str, cluster: str) -> str:
+    return f"{tenant}{SEP}{cluster}"
+
+def build_matcher(tenants: List[Tenant]) -> StreetMatcher:
+    return StreetMatcher({
+        _cluster_id(t.name, cluster): streets
+        for t in tenants
+        for cluster, streets in t.clusters.items()
+    })
+
+def match_tenants(tenants: List[Tenant], snapshot: Snapshot) -> List[Tuple[Tenant, Dict[str, dict]]]:
+    # jedan prolaz automata za sve tenante, pa rezultati po tenantu
+    matched = match_snapshot(snapshot, build_matcher(tenants), default_store())
+    return [(t, {c: matched[_cluster_id(t.name, c)] for c in t.clusters}) for t in tenants]
+
+def prepare_tenant(tenant: Tenant, results: Dict[str, dict],
+                   snapshot: Snapshot) -> Tuple[Optional[Message], Callable[[], None]]:
+    # vraća poruku (ili None) i potvrdu stanja koja se poziva posle isporuke;
+    # diff režim: javljamo samo novo, izmenjeno i otkazano od prošlog slanja
+    records = results_records(results)
+    state = StateStore(tenant.name) if DIFF_ENABLED else None
+    if state is not None:
+        results = state.diff(records, snapshot).results(list(tenant.clusters))
+
+    def commit() -> None:
+        if state is not None:
+            state.commit(records, snapshot)
+
+    with METRICS.stage("render", tenant=tenant.name) as m:
+        report = REPORTS[tenant.report](tenant.clusters, results, source_status(snapshot))
+        m["empty"] = report is None
+    if report is None:
+        print(f"📭 [{tenant.name}] Nema novih pogodaka (struja/voda) — email neće biti poslat.")
+        return None, commit
+
+    print(f"✅ [{tenant.name}] Pronađeni rezultati — šaljem email…")
+    subject, html_body, text_body = report
+    return Message(subject, html_body, text_body, tenant.recipients(), tenant=tenant.name), commit
+
+def run_tenants(tenants: List[Tenant], snapshot: Optional[Snapshot] = None) -> None:
+    for t in tenants:
+        if t.report not in REPORTS:
+            raise ValueError(f"[{t.name}] nepoznata vrsta izveštaja: {t.report}")
+
+    try:
+        with METRICS.stage("run", tenants=len(tenants)):
+            # svaka stranica se preuzima jednom za sve tenante
+            if snapshot is None:
+                snapshot = take_snapshot()
+            archive_snapshot(snapshot)
+            # prvo se renderuju sve poruke, pa idu kroz jednu SMTP sesiju
+            prepared = [prepare_tenant(t, results, snapshot)
+                        for t, results in match_tenants(tenants, snapshot)]
+            messages = [msg for msg, _commit in prepared if msg is not None]
+            # i kad nema novih poruka, outbox iz ranijih pokretanja se šalje
+            outcome = deliver(messages)
+
+            # stanje pamtimo tek kad je izveštaj otišao ili čeka u outboxu
+            for msg, commit in prepared:
+                if msg is None or outcome.get(msg.id) in (SENT, QUEUED):
+                    commit()
+    finally:
+        METRICS.flush()
+
+def run(snapshot: Optional[Snapshot] = None) -> None:
+    run_tenants(load_config().active(), snapshot)
+
+# ===== MAIN =====
+if __name__ == "__main__":
+    # --watch: dugotrajni režim sa adaptivnim intervalima umesto jednog prolaza
+    if "--watch" in sys.argv[1:]:
+        from epsbvk.watch import watch
+
+        watch(run)
+    else:
+        run()
@@ -0,0 +1,201 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple
+
+# ===== STREAMING EKSTRAKCIJA =====
+# Umesto celog BeautifulSoup stabla, parser dobija telo u delovima i pamti
+# samo ono što nam treba; čitanje se prekida čim je posao gotov.
+
+# (opstina, vreme, ulice)
+EpsRow = Tuple[str, str, str]
+
+BVK_STOP = ("Распоред аутоцистерни", "Raspored autocisterni")
+BVK_SKIP = ("share", "facebook", "twitter", "whatsapp")
+
+class MissingTable(ValueError):
+    # stranica je stigla, ali bez tabele isključenja (održavanje, stranica
+    # greške) — to nije isto što i tabela bez redova
+    pass
+
+class EpsTableExtractor(HTMLParser):
+    # redovi druge <table> na stranici; gotovo kad se ta tabela zatvori
+    def __init__(self):
+        super().__init__()
+        self.rows: List[EpsRow] = []
+        self.done = False
+        self._tables = 0
+        self._depth = 0          # dubina unutar ciljne tabele
+        self._row_index = -1
+        self._cells: Optional[List[List[str]]] = None
+        self._buf: List[str] = []
+
+    def _finish_row(self) -> None:
+        cells, self._cells = self._cells, None
+        if cells is None:
+            return
+        self._row_index += 1
+        # prvi red je zaglavlje
+        if self._row_index > 0 and len(cells) == 3:
+            self.rows.append(("".join(cells[0]), "".join(cells[1]), " ".join(cells[2])))
+
+    def _flush(self) -> None:
+        # tekst između dva taga može stići u više delova
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if text and self._depth and self._cells:
+            self._cells[-1].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self._flush()
+        if tag == "table":
+            if self._depth:
+                self._depth += 1
+            else:
+                self._tables += 1
+                if self._tables == 2:
+                    self._depth = 1
+            return
+        if not self._depth:
+            return
+        if tag == "tr":
+            self._finish_row()
+            self._cells = []
+        elif tag == "td" and self._cells is not None:
+            self._cells.append([])
+
+    def handle_endtag(self, tag):
+        if self.done or not self._depth:
+            return
+        self._flush()
+        if tag == "table":
+            self._depth -= 1
+            if not self._depth:
+                self._finish_row()
+                self.done = True
+        elif tag == "tr":
+            self._finish_row()
+
+    def handle_data(self, data):
+        if self._depth and self._cells:
+            self._buf.append(data)
+
+    def result(self) -> List[EpsRow]:
+        if self._tables < 2:
+            raise MissingTable("na stranici nema tabele isključenja")
+        if not self.done:
+            self._flush()
+            self._finish_row()
+        return self.rows
+
+class BvkItemsExtractor(HTMLParser):
+    # tekst svih <li> do "Распоред аутоцистерни"; gotovo čim naiđe ta stavka
+    def __init__(self):
+        super().__init__()
+        self.items: List[str] = []
+        self.done = False
+        self._slots: List[Optional[List[str]]] = []   # tekst po <li>, redom otvaranja
+        self._closed: List[bool] = []
+        self._emitted = 0
+        self._stack: List[Tuple[str, int]] = []       # otvoreni ul/ol/li
+        self._skip = 0                                # unutar <script>/<style>
+        self._texts: Optional[List[str]] = []         # samo za rezervni regex
+        self._buf: List[str] = []
+
+    def _close_li(self, slot: int) -> None:
+        self._closed[slot] = True
+        while self._emitted < len(self._slots) and self._closed[self._emitted]:
+            text = " ".join(self._slots[self._emitted])
+            self._slots[self._emitted] = None
+            self._emitted += 1
+            if any(stop in text for stop in BVK_STOP):
+                self.done = True
+                return
+            if any(bad in text.lower() for bad in BVK_SKIP):
+                continue
+            self.items.append(text)
+            self._texts = None
+
+    def _pop_until(self, tag: str) -> None:
+        if not any(t == tag for t, _ in self._stack):
+            return
+        while self._stack and not self.done:
+            t, slot = self._stack.pop()
+            if t == "li":
+                self._close_li(slot)
+            if t == tag:
+                break
+
+    def _flush(self) -> None:
+        # tekst između dva taga može stići u više delova
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if not text:
+            return
+        for t, slot in self._stack:
+            if t == "li":
+                self._slots[slot].append(text)
+        if self._texts is not None:
+            self._texts.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self._flush()
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag == "li":
+            self._slots.append([])
+            self._closed.append(False)
+            self._stack.append(("li", len(self._slots) - 1))
+        elif tag in ("ul", "ol"):
+            self._stack.append((tag, -1))
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        self._flush()
+        if tag in ("script", "style"):
+            self._skip = max(self._skip - 1, 0)
+        elif tag in ("li", "ul", "ol"):
+            self._pop_until(tag)
+
+    def handle_data(self, data):
+        if not self.done and not self._skip:
+            self._buf.append(data)
+
+    def result(self) -> List[str]:
+        if not self.done:
+            self._flush()
+            self._pop_until_all()
+        items = list(self.items)
+        if not items and self._texts:
+            text = "\n".join(self._texts)
+            m = re.search(r"(Без воде су.*?)(Рaspored аутоцистерни|$)", text, flags=re.S | re.I)
+            if m:
+                for line in m.group(1).splitlines():
+                    line = line.strip("•*- \t")
+                    if len(line) > 3:
+                        items.append(line)
+        return items
+
+    def _pop_until_all(self) -> None:
+        # nezatvorene stavke na kraju dokumenta
+        while self._stack and not self.done:
+            t, slot = self._stack.pop()
+            if t == "li":
+                self._close_li(slot)
+
+def stream_extract(chunks: Iterable[bytes], encoding: str, extractor):
+    # hrani parser deo po deo i prestaje da čita čim je ekstrakcija gotova
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        extractor.feed(decoder.decode(chunk))
+        if extractor.done:
+            break
+    else:
+        extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+    return extractor.result()
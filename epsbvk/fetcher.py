@@ -0,0 +1,337 @@
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from email.utils import formatdate
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, NamedTuple, Optional, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from epsbvk.httpcache import HttpCache
+from epsbvk.metrics import METRICS
+from epsbvk.store import SnapshotStore
+
+T = TypeVar("T")
+
+# parser dobija odgovor i iterator delova tela (bajtovi)
+Parser = Callable[[requests.Response, Iterable[bytes]], T]
+
+# veličina dela tela koji se prosleđuje streaming parseru
+CHUNK_SIZE = 16 * 1024
+
+# ponovljeni pokušaji: do RETRIES dodatnih, čekanje nasumično u [0, BACKOFF·2^n)
+RETRIES = 2
+BACKOFF = 0.5
+# posle BREAKER_THRESHOLD uzastopnih grešaka host se ne kontaktira BREAKER_COOLDOWN sekundi
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 300.0
+
+class RetryableStatus(requests.HTTPError):
+    # 5xx i 429 — server je privremeno nedostupan
+    pass
+
+class CircuitOpen(requests.ConnectionError):
+    pass
+
+# greške posle kojih ima smisla pokušati ponovo
+RETRYABLE = (requests.ConnectionError, requests.Timeout,
+             requests.exceptions.ChunkedEncodingError, RetryableStatus)
+
+class Fetched(NamedTuple):
+    digest: str
+    data: Any
+    # True kad je izvor bio nedostupan pa su vraćeni poslednji dobri podaci
+    stale: bool = False
+    # kada je sadržaj poslednji put potvrđen kao aktuelan (unix vreme)
+    checked_at: Optional[float] = None
+
+class CircuitBreaker:
+    # zatvoren -> (THRESHOLD grešaka) otvoren -> (COOLDOWN) jedan probni zahtev
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # probni zahtev; ostali čekaju njegov ishod
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self, error: BaseException) -> None:
+        with self._lock:
+            self.last_error = error
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+# ===== FILE:// TRANSPORT =====
+# Offline replay: snimljene stranice se čitaju sa diska istim putem kao sa
+# mreže (streaming, ETag/304, keš), pa se ceo pipeline može vrteti bez interneta.
+class FileAdapter(BaseAdapter):
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        path = url2pathname(urlsplit(request.url).path)
+        resp = requests.Response()
+        resp.url = request.url
+        resp.request = request
+        resp.encoding = "utf-8"
+        try:
+            st = os.stat(path)
+        except OSError:
+            resp.status_code = 404
+            resp.reason = "Not Found"
+            resp.raw = io.BytesIO(b"")
+            return resp
+
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        resp.headers["ETag"] = etag
+        resp.headers["Last-Modified"] = formatdate(st.st_mtime, usegmt=True)
+        resp.headers["Content-Type"] = "text/html; charset=utf-8"
+        if request.headers.get("If-None-Match") == etag:
+            resp.status_code = 304
+            resp.reason = "Not Modified"
+            resp.raw = io.BytesIO(b"")
+            return resp
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.headers["Content-Length"] = str(st.st_size)
+        resp.raw = open(path, "rb")
+        return resp
+
+    def close(self):
+        pass
+
+# ===== FETCH ENGINE =====
+# Jedna requests.Session sa keep-alive pool-om: DNS/TCP/TLS se plaća jednom
+# po hostu, a sve stranice se skidaju paralelno uz limit po hostu i ukupni rok.
+# Prolazne greške se ponavljaju u okviru roka, host koji stalno pada se
+# privremeno preskače, a kad izvor ne odgovori vraćaju se poslednji dobri
+# podaci iz keša označeni kao zastareli.
+class Fetcher:
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: float = 20,
+                 max_workers: int = 8, per_host: int = 2, deadline: Optional[float] = None,
+                 cache: Optional[HttpCache] = None, store: Optional[SnapshotStore] = None,
+                 retries: int = RETRIES, backoff: float = BACKOFF):
+        self.timeout = timeout
+        self.cache = cache
+        self.store = store
+        self.deadline = deadline
+        self.per_host = per_host
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max(per_host, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.mount("file://", FileAdapter())
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+            return self._breakers[host]
+
+    def get(self, url: str, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        with self._slot(url):
+            return self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+
+    def _stored(self, parse: Parser, digest: Optional[str]) -> Optional[T]:
+        if self.store is None or not digest:
+            return None
+        return self.store.get(parse.__name__, digest)
+
+    def fetch(self, url: str, parse: Parser, timeout: Optional[float] = None) -> Tuple[str, T]:
+        # uslovni GET; vraća (heš pročitanog tela, parsirani podaci)
+        t0 = time.perf_counter()
+        entry = self.cache.load(url) if self.cache is not None else None
+        # validatori se šalju samo kad postoji sačuvan rezultat kojim se
+        # odgovara na 304 (npr. bez store-a 304 bi tražio još jedan GET)
+        parsed = self._stored(parse, entry.get("sha256")) if entry is not None else None
+        if parsed is None:
+            entry = None
+        resp = self.get(url, timeout=timeout, headers=HttpCache.validators(entry), stream=True)
+        if resp.status_code == 304 and entry is not None:
+            resp.close()
+            self.cache.touch(url, entry)
+            METRICS.record("fetch", url=url, status=304, bytes=0, parse_ms=0.0, records=len(parsed),
+                           duration_ms=round((time.perf_counter() - t0) * 1000, 3))
+            return entry["sha256"], parsed
+        if resp.status_code >= 500 or resp.status_code == 429:
+            resp.close()
+            raise RetryableStatus(f"{resp.status_code} {resp.reason} za {url}", response=resp)
+
+        # parser čita telo u delovima i može da stane pre kraja; heš se računa
+        # nad pročitanim delom, što je dovoljno za prepoznavanje istog sadržaja
+        hasher = hashlib.sha256()
+        size = 0
+        network = 0.0
+
+        def chunks() -> Iterator[bytes]:
+            nonlocal size, network
+            it = resp.iter_content(CHUNK_SIZE)
+            while True:
+                n0 = time.perf_counter()
+                chunk = next(it, None)
+                network += time.perf_counter() - n0
+                if chunk is None:
+                    return
+                size += len(chunk)
+                hasher.update(chunk)
+                yield chunk
+
+        p0 = time.perf_counter()
+        with resp:
+            parsed = parse(resp, chunks())
+        parse_s = time.perf_counter() - p0 - network
+        digest = hasher.hexdigest()
+        METRICS.record("fetch", url=url, status=resp.status_code, bytes=size,
+                       parse_ms=round(parse_s * 1000, 3), records=len(parsed),
+                       duration_ms=round((time.perf_counter() - t0) * 1000, 3))
+        if resp.ok:
+            if self.store is not None:
+                self.store.put(parse.__name__, digest, parsed)
+            if self.cache is not None:
+                self.cache.store(url, resp, digest)
+        return digest, parsed
+
+    def fetch_retrying(self, url: str, parse: Parser, until: Optional[float] = None) -> Fetched:
+        # until: time.monotonic() rok za sve pokušaje zajedno
+        breaker = self._breaker(url)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpen(f"{urlsplit(url).netloc} privremeno preskočen posle uzastopnih grešaka "
+                                  f"(poslednja: {type(breaker.last_error).__name__})")
+            timeout = self.timeout
+            if until is not None:
+                remaining = until - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"isteklo vreme za {url}")
+                timeout = min(timeout, remaining)
+            try:
+                digest, parsed = self.fetch(url, parse, timeout=timeout)
+            except RETRYABLE as e:
+                breaker.failure(e)
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                if attempt >= self.retries or (until is not None and time.monotonic() + delay >= until):
+                    raise
+                attempt += 1
+                METRICS.record("fetch_retry", url=url, attempt=attempt, error=str(e),
+                               delay_ms=round(delay * 1000, 3))
+                time.sleep(delay)
+                continue
+            breaker.success()
+            return Fetched(digest, parsed, checked_at=time.time())
+
+    def last_good(self, url: str, parse: Parser) -> Optional[Fetched]:
+        # poslednji uspešno preuzet sadržaj ovog URL-a (keš validatora + store)
+        entry = self.cache.load(url) if self.cache is not None else None
+        if entry is None:
+            return None
+        parsed = self._stored(parse, entry.get("sha256"))
+        if parsed is None:
+            return None
+        return Fetched(entry["sha256"], parsed, stale=True,
+                       checked_at=entry.get("checked_at", entry.get("stored_at")))
+
+    def _fallback(self, url: str, parse: Parser, error: BaseException) -> Union[Fetched, BaseException]:
+        METRICS.record("fetch_error", url=url, error=str(error))
+        # 4xx znači da stranice nema, a ne da je server privremeno nedostupan
+        if isinstance(error, requests.HTTPError) and not isinstance(error, RetryableStatus):
+            return error
+        stale = self.last_good(url, parse)
+        if stale is None:
+            return error
+        age = time.time() - (stale.checked_at or 0)
+        METRICS.record("fetch_stale", url=url, age_ms=round(age * 1000, 3))
+        return stale
+
+    def fetch_resilient(self, url: str, parse: Parser, until: Optional[float] = None,
+                        stale: bool = True) -> Fetched:
+        try:
+            return self.fetch_retrying(url, parse, until)
+        except Exception as e:
+            res = self._fallback(url, parse, e) if stale else None
+            if not isinstance(res, Fetched):
+                raise
+            return res
+
+    def get_parsed(self, url: str, parse: Parser) -> T:
+        # samo sveži podaci; poslednje dobre (uz proveru starosti) daje
+        # sources.fetch_page(), koji pozivaocu javlja i da su zastareli
+        until = time.monotonic() + self.deadline if self.deadline is not None else None
+        return self.fetch_resilient(url, parse, until, stale=False).data
+
+    def fetch_all(self, jobs: Dict[Hashable, Tuple[str, Parser]], stale: bool = True
+                  ) -> Dict[Hashable, Union[Fetched, BaseException]]:
+        # jobs: ključ -> (url, parser); rezultat je Fetched ili izuzetak.
+        # Uz stale=True neuspeo izvor vraća poslednje dobre podatke (Fetched.stale).
+        until = time.monotonic() + self.deadline if self.deadline is not None else None
+
+        def run(url: str, parse: Parser) -> Fetched:
+            return self.fetch_retrying(url, parse, until)
+
+        results: Dict[Hashable, Union[Fetched, BaseException]] = {}
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(jobs), 1)))
+        try:
+            futures = {pool.submit(run, url, parse): key for key, (url, parse) in jobs.items()}
+            done, _pending = wait(futures, timeout=self.deadline)
+            for fut, key in futures.items():
+                if fut in done:
+                    exc = fut.exception()
+                    res = exc if exc is not None else fut.result()
+                else:
+                    res = TimeoutError(f"isteklo ukupno vreme ({self.deadline}s)")
+                if isinstance(res, BaseException):
+                    url, parse = jobs[key]
+                    if stale:
+                        res = self._fallback(url, parse, res)
+                    else:
+                        METRICS.record("fetch_error", url=url, error=str(res))
+                results[key] = res
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "Fetcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
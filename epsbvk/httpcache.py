@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+# ===== HTTP KEŠ NA DISKU =====
+# Po URL-u čuvamo validatore (ETag/Last-Modified) i heš sadržaja;
+# na 304 odgovor se parsirani podaci uzimaju iz SnapshotStore-a po tom heš-u.
+CACHE_DIR = os.getenv("EPS_CACHE_DIR", os.path.join(".cache", "http"))
+
+class HttpCache:
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def store(self, url: str, resp: "requests.Response", digest: str) -> None:
+        now = time.time()
+        self._write(url, {
+            "url": url,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "stored_at": now,
+            # poslednja potvrda da je sadržaj aktuelan (200 ili 304)
+            "checked_at": now,
+            "sha256": digest,
+        })
+
+    def touch(self, url: str, entry: Dict[str, Any]) -> None:
+        self._write(url, dict(entry, checked_at=time.time()))
+
+    def _write(self, url: str, entry: Dict[str, Any]) -> None:
+        path = self._path(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Keš greška ({url}): {e}")
+
+    @staticmethod
+    def validators(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
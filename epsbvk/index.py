@@ -0,0 +1,158 @@
+import argparse
+import re
+import sys
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from epsbvk.metrics import METRICS
+from epsbvk.normalize import norm_street
+from epsbvk.sources import Snapshot, cached_snapshot, take_snapshot
+
+# ===== INVERTOVANI INDEKS ULICA =====
+# Jedan prolaz kroz snapshot razlaže EPS "ulice" i BVK stavke na pojedinačne
+# ulice; normalizovano ime (ASCII, mala slova) i svaka njegova reč upućuju na
+# isključenja. Upit se normalizuje isto, pa ćirilica/latinica i dijakritici
+# ne utiču na rezultat.
+
+class Outage(NamedTuple):
+    source: str        # "eps" ili "bvk"
+    day: str           # "danas"/"sutra" za EPS, "" za BVK
+    date: str
+    opstina: str
+    vreme: str
+    street: str        # ulica kako je navedena na stranici
+    numbers: str       # brojevi uz ulicu ("1-5, 9"), ako postoje
+    text: str          # cela linija iz koje je ulica izvučena
+    url: str
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_HAS_LETTER = re.compile(r"[^\W\d_]")
+# segment koji je broj kuće ("13", "11А", "2Б", "бб") nastavlja listu prethodne ulice
+_HOUSE_NUMBER = re.compile(r"(?:\d|(?:бб|bb)\b)", re.I)
+# BVK: "Таковска од броја 12 до 20" / "Косовска 3" — ime ulice je deo pre prvog broja
+_BVK_STREET = re.compile(r"^(.*?)(?:\s+(?:од|od)\s+(?:броја|broja)\b.*|\s+(?:бр\.?|br\.?)?\s*\d.*)?$", re.I)
+
+def split_eps_streets(ulice: str) -> List[Tuple[str, str]]:
+    # "Насеље Ледине: НИКОДИМА МИЛАША: 1-5, БУЛЕВАР ЦРВЕНЕ АРМИЈЕ: 2,"
+    out: List[Tuple[str, str]] = []
+    for seg in ulice.split(","):
+        parts = [p.strip() for p in seg.split(":")]
+        if len(parts) >= 2:
+            street, numbers = parts[-2], parts[-1]
+        else:
+            street, numbers = parts[0], ""
+        # nastavak liste brojeva prethodne ulice ("20-44, 50", "11А"); segment
+        # sa ":" je nova ulica i kad počinje cifrom ("27. МАРТА: 4")
+        if not _HAS_LETTER.search(street) or (len(parts) < 2 and _HOUSE_NUMBER.match(street)):
+            if out and street:
+                prev, nums = out[-1]
+                out[-1] = (prev, f"{nums}, {street}" if nums else street)
+            continue
+        out.append((street, numbers))
+    return out
+
+def split_bvk_streets(item: str) -> List[Tuple[str, str]]:
+    # "Стари град: Таковска од броја 12 до 20, Косовска 3"
+    _opstina, sep, rest = item.partition(":")
+    out: List[Tuple[str, str]] = []
+    for seg in (rest if sep else item).split(","):
+        seg = seg.strip()
+        m = _BVK_STREET.match(seg)
+        street = m.group(1).strip() if m else seg
+        if _HAS_LETTER.search(street):
+            out.append((street, seg[len(street):].strip()))
+    return out
+
+def _bvk_opstina(item: str) -> str:
+    opstina, sep, _rest = item.partition(":")
+    return opstina.strip() if sep else ""
+
+class StreetIndex:
+    def __init__(self, snapshot: Snapshot):
+        self.records: List[Outage] = []
+        # normalizovano ime ulice -> indeksi u self.records
+        self._streets: Dict[str, List[int]] = {}
+        # reč -> normalizovana imena ulica koja je sadrže
+        self._tokens: Dict[str, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+
+        with METRICS.stage("index") as m:
+            for day, rows in snapshot.eps.items():
+                url = snapshot.eps_urls.get(day, "")
+                datum = snapshot.eps_date(day)
+                for opstina, vreme, ulice in rows:
+                    for street, numbers in split_eps_streets(ulice):
+                        self._add(Outage("eps", day, datum, opstina, vreme, street, numbers, ulice, url))
+            for raw in snapshot.bvk:
+                opstina = _bvk_opstina(raw)
+                for street, numbers in split_bvk_streets(raw):
+                    self._add(Outage("bvk", "", "", opstina, "", street, numbers, raw, snapshot.bvk_url))
+            self._sorted_tokens = sorted(self._tokens)
+            m["records"] = len(self.records)
+            m["streets"] = len(self._streets)
+
+    def _add(self, outage: Outage) -> None:
+        key = norm_street(outage.street)
+        if not key:
+            return
+        self._streets.setdefault(key, []).append(len(self.records))
+        self.records.append(outage)
+        for tok in _TOKEN.findall(key):
+            self._tokens.setdefault(tok, set()).add(key)
+
+    def _prefixed(self, prefix: str) -> Set[str]:
+        keys: Set[str] = set()
+        tokens = self._sorted_tokens
+        i = bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            keys |= self._tokens[tokens[i]]
+            i += 1
+        return keys
+
+    def streets(self, query: str, prefix: bool = False) -> List[str]:
+        # imena ulica (normalizovana) koja sadrže sve reči upita;
+        # uz prefix=True poslednja reč može biti nedovršena
+        words = _TOKEN.findall(norm_street(query))
+        if not words:
+            return []
+        *full, last = words
+        keys = self._prefixed(last) if prefix else set(self._tokens.get(last, ()))
+        for w in full:
+            keys &= self._tokens.get(w, set())
+            if not keys:
+                break
+        return sorted(keys)
+
+    def lookup(self, query: str, prefix: bool = False) -> List[Outage]:
+        ids: Set[int] = set()
+        for key in self.streets(query, prefix=prefix):
+            ids.update(self._streets[key])
+        # redosled kao na stranicama (EPS po danima, pa BVK)
+        return [self.records[i] for i in sorted(ids)]
+
+    def exact(self, street: str) -> List[Outage]:
+        return [self.records[i] for i in self._streets.get(norm_street(street), ())]
+
+    def affected(self, query: str, prefix: bool = False) -> bool:
+        return bool(self.streets(query, prefix=prefix))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m epsbvk query-index",
+                                 description="Da li je ulica pogođena isključenjem?")
+    ap.add_argument("streets", nargs="+", metavar="ULICA")
+    ap.add_argument("--prefix", action="store_true", help="poslednja reč može biti nedovršena")
+    ap.add_argument("--offline", action="store_true", help="poslednji preuzeti podaci iz keša, bez mreže")
+    args = ap.parse_args(argv)
+
+    index = StreetIndex(cached_snapshot() if args.offline else take_snapshot())
+    for q in args.streets:
+        hits = index.lookup(q, prefix=args.prefix)
+        print(f"🔎 {q}: {len(hits)} pogodaka")
+        for o in hits:
+            when = f"{o.date} {o.vreme}".strip() if o.source == "eps" else "BVK"
+            nums = f" ({o.numbers})" if o.numbers else ""
+            print(f"   [{when}] {o.opstina}: {o.street}{nums}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from epsbvk.metrics import METRICS
+from epsbvk.store import json_hash
+
+# ===== EMAIL =====
+# Sve poruke jednog pokretanja se prvo renderuju, pa šalju kroz jednu
+# autentifikovanu SMTP sesiju. Prolazne greške se ponavljaju sa rastućim
+# čekanjem; poruka koja ni tada ne prođe ide u outbox na disku i šalje se
+# na početku sledećeg pokretanja. Trajno odbijena poruka (5xx, npr. svi
+# primaoci odbijeni) se ne ponavlja i ne čuva.
+OUTBOX_DIR = os.getenv("EPS_OUTBOX_DIR", os.path.join(".cache", "outbox"))
+# poruke starije od ovoga se odbacuju (izveštaj o isključenju je zastareo)
+OUTBOX_MAX_AGE_DAYS = 2
+SMTP_TIMEOUT = 15
+MAX_ATTEMPTS = 3
+BACKOFF = 2.0  # sekunde pre drugog pokušaja, pa duplo
+
+# ishod isporuke poruke
+SENT, QUEUED, FAILED = "sent", "queued", "failed"
+
+# smtplib/email (i ssl) se učitavaju tek pri slanju
+if TYPE_CHECKING:
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+
+@dataclass
+class SmtpSettings:
+    host: str
+    port: int
+    user: Optional[str]
+    password: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "SmtpSettings":
+        return cls(
+            host=os.getenv("SMTP_HOST", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            user=os.getenv("SMTP_USER"),
+            password=os.getenv("SMTP_PASS"),
+        )
+
+    def complete(self) -> bool:
+        return bool(self.user and self.password)
+
+@dataclass
+class Message:
+    subject: str
+    html_body: str
+    text_body: str = ""
+    email_to: List[str] = field(default_factory=list)
+    tenant: str = ""
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def id(self) -> str:
+        # ista poruka istim primaocima se u outboxu čuva jednom
+        return json_hash([self.email_to, self.subject, self.html_body, self.text_body])[:24]
+
+    def mime(self, sender: str) -> "MIMEMultipart":
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        msg = MIMEMultipart("alternative")
+        msg["From"] = sender
+        msg["To"] = ", ".join(self.email_to)
+        msg["Subject"] = self.subject
+        if self.text_body:
+            msg.attach(MIMEText(self.text_body, "plain", "utf-8"))
+        msg.attach(MIMEText(self.html_body, "html", "utf-8"))
+        return msg
+
+class Outbox:
+    def __init__(self, directory: str = OUTBOX_DIR):
+        self.directory = directory
+
+    def _path(self, msg_id: str) -> str:
+        return os.path.join(self.directory, f"{msg_id}.json")
+
+    def put(self, msg: Message) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self._path(msg.id)}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(asdict(msg), f, ensure_ascii=False)
+            os.replace(tmp, self._path(msg.id))
+            return True
+        except OSError as e:
+            print(f"⚠️ Outbox greška: {e}")
+            return False
+
+    def pending(self) -> List[Message]:
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            return []
+        cutoff = time.time() - OUTBOX_MAX_AGE_DAYS * 86400
+        out = []
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    msg = Message(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                continue
+            if msg.created_at < cutoff:
+                print(f"🗑️ Outbox: odbacujem zastarelu poruku „{msg.subject}”")
+                self.remove(msg.id)
+                continue
+            out.append(msg)
+        return out
+
+    def remove(self, msg_id: str) -> None:
+        try:
+            os.remove(self._path(msg_id))
+        except OSError:
+            pass
+
+def _permanent(e: Exception) -> bool:
+    # 5xx odgovor na poruku je trajan; prekinuta veza, timeout i 4xx nisu
+    import smtplib
+
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in e.recipients.values())
+    if isinstance(e, (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError, smtplib.SMTPHeloError)):
+        return False
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+
+class Mailer:
+    # jedna SMTP veza za sve poruke; otvara se tek kad zatreba
+    def __init__(self, settings: Optional[SmtpSettings] = None, outbox: Optional[Outbox] = None,
+                 attempts: int = MAX_ATTEMPTS, backoff: float = BACKOFF, timeout: float = SMTP_TIMEOUT):
+        self.settings = settings or SmtpSettings.from_env()
+        self.outbox = outbox
+        self.attempts = attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self._server: Optional["smtplib.SMTP"] = None
+        # posle odbijene prijave ostale poruke ne pokušavamo
+        self._fatal: Optional[Exception] = None
+
+    def _connect(self) -> "smtplib.SMTP":
+        import smtplib
+
+        if self._server is None:
+            s = self.settings
+            server = smtplib.SMTP(s.host, s.port, timeout=self.timeout)
+            try:
+                server.starttls()
+                server.login(s.user, s.password)
+            except Exception:
+                server.close()
+                raise
+            self._server = server
+        return self._server
+
+    def _drop(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
+
+    def close(self) -> None:
+        self._drop()
+
+    def __enter__(self) -> "Mailer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _send_once(self, msg: Message) -> None:
+        self._connect().send_message(msg.mime(self.settings.user))
+
+    def _send(self, msg: Message) -> str:
+        # SENT; QUEUED kad vredi pokušati kasnije (veza, 4xx, odbijena
+        # prijava); FAILED kad server trajno (5xx) odbije baš ovu poruku
+        import smtplib
+
+        if self._fatal is not None:
+            return QUEUED
+        last: Optional[Exception] = None
+        t0 = time.perf_counter()
+        attempt = 0
+        for attempt in range(1, self.attempts + 1):
+            try:
+                self._send_once(msg)
+                last = None
+                break
+            except smtplib.SMTPAuthenticationError as e:
+                last = self._fatal = e
+                break
+            except (smtplib.SMTPException, OSError) as e:
+                last = e
+                if _permanent(e):
+                    # ponavljanje ne pomaže; veza ostaje za sledeće poruke
+                    break
+                self._drop()
+                if attempt < self.attempts:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    time.sleep(delay * random.uniform(0.8, 1.2))
+        METRICS.record("send", tenant=msg.tenant, ok=last is None, attempts=attempt,
+                       duration_ms=round((time.perf_counter() - t0) * 1000, 3))
+        if last is not None:
+            print(f"⚠️ Greška pri slanju email-a ({attempt} pokušaja): {last}")
+            return FAILED if _permanent(last) else QUEUED
+        print(f"📧 Email poslat na {', '.join(msg.email_to)} • Subject: {msg.subject}")
+        return SENT
+
+    def send(self, msg: Message) -> bool:
+        return self._send(msg) == SENT
+
+    def deliver(self, messages: List[Message]) -> Dict[str, str]:
+        # ishod po id-u poruke: SENT, QUEUED (u outboxu) ili FAILED
+        outcome: Dict[str, str] = {}
+        backlog = self.outbox.pending() if self.outbox is not None else []
+        if backlog:
+            print(f"📤 Outbox: {len(backlog)} poruka iz ranijih pokretanja")
+        if not backlog and not messages:
+            return outcome
+        if not self.settings.complete():
+            print("⚠️ Nedostaju SMTP kredencijali.")
+            return {m.id: FAILED for m in messages}
+
+        for msg in backlog + messages:
+            if msg.id in outcome:
+                continue
+            if not msg.email_to:
+                print(f"⚠️ [{msg.tenant}] Nedostaju primaoci.")
+                outcome[msg.id] = FAILED
+                continue
+            result = self._send(msg)
+            if result != QUEUED:
+                outcome[msg.id] = result
+                if self.outbox is not None:
+                    self.outbox.remove(msg.id)
+            elif self.outbox is not None and self.outbox.put(msg):
+                print(f"📥 [{msg.tenant}] Poruka sačuvana u outbox za sledeće pokretanje.")
+                outcome[msg.id] = QUEUED
+            else:
+                outcome[msg.id] = FAILED
+        return outcome
+
+def deliver(messages: List[Message], outbox_dir: str = OUTBOX_DIR) -> Dict[str, str]:
+    # prazan EPS_OUTBOX_DIR isključuje outbox
+    outbox = Outbox(outbox_dir) if outbox_dir else None
+    with Mailer(outbox=outbox) as mailer:
+        return mailer.deliver(messages)
+
+def send_email(subject: str, html_body: str, text_body: str = "",
+               email_to: Optional[List[str]] = None) -> bool:
+    # jedna poruka, bez outboxa (stari interfejs skripti)
+    if email_to is None:
+        email_to = [a.strip() for a in os.getenv("EMAIL_TO", "").split(",") if a.strip()]
+    settings = SmtpSettings.from_env()
+    if not (settings.complete() and email_to):
+        print("⚠️ Nedostaju SMTP kredencijali ili primaoci.")
+        return False
+    with Mailer(settings) as mailer:
+        return mailer.send(Message(subject, html_body, text_body, email_to))
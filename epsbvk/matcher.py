@@ -0,0 +1,321 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from epsbvk.metrics import METRICS
+from epsbvk.normalize import norm_line
+from epsbvk.sources import Snapshot
+from epsbvk.store import SnapshotStore, json_hash
+from epsbvk.timewindow import Interval, merge_intervals, parse_vreme
+
+# ===== VARIJANTE ULICA =====
+# Skraćenice iz EPS/BVK tekstova i konfiguracije; svaka reč iz grupe se
+# zamenjuje svakom drugom. Pismo i dijakritici su već izjednačeni u
+# norm_line(), a crtice i tačke su tamo samo granice reči.
+_ALIAS_GROUPS = [
+    ("bulevar", "bul", "blvd"),
+    ("kralja", "kr"),
+    ("kraljice", "kr"),
+    ("kneza", "knez", "kn"),
+    ("vojvode", "vojv", "voj"),
+    ("generala", "gen"),
+    ("doktora", "dr"),
+    ("profesora", "prof"),
+    ("kapetana", "kapetan", "kap"),
+    ("majora", "maj"),
+    ("svetog", "sv"),
+    ("svete", "sv"),
+    ("narodnog", "nar"),
+    ("patrijarha", "patr"),
+    ("admirala", "adm"),
+    ("pukovnika", "puk"),
+]
+ALIASES: Dict[str, Tuple[str, ...]] = {}
+for _group in _ALIAS_GROUPS:
+    for _word in _group:
+        ALIASES[_word] = tuple(dict.fromkeys(ALIASES.get(_word, (_word,)) + _group))
+# "ulica"/"ul." ispred imena se u tekstu najčešće izostavlja
+_STREET_WORDS = ("ulica", "ul")
+# gornja granica broja varijanti jedne ulice
+MAX_VARIANTS = 16
+
+def street_variants(street: str) -> List[str]:
+    words = norm_line(street).split()
+    if len(words) > 1 and words[0] in _STREET_WORDS:
+        words = words[1:]
+    variants = [""]
+    for w in words:
+        variants = [f"{v} {a}".lstrip() for v in variants for a in ALIASES.get(w, (w,))][:MAX_VARIANTS]
+    return [v for v in variants if v]
+
+# ===== PRETRAGA SA GREŠKAMA =====
+# Reč teksta se poredi sa svim rečima posmatranih ulica odjednom: Levenštajnov
+# automat (redovi DP tabele) se pušta niz trie reči i odseca čim red pređe
+# granicu. Ulica se pronalazi kao niz reči, sa najviše FUZZY_EDITS izmena
+# ukupno; kratke reči i brojevi moraju da se poklope tačno, a jednorečna ulica
+# toleriše grešku tek od FUZZY_MIN_SINGLE slova (Kosovska/Kosovske su dve ulice).
+FUZZY_EDITS = 1
+FUZZY_MIN_WORD = 5
+FUZZY_MIN_SINGLE = 10
+# granica keša "reč teksta -> bliske reči ulica"
+NEAR_CACHE_SIZE = 16384
+
+def _deletions(word: str) -> List[str]:
+    # reč i svi oblici sa jednim izbačenim slovom; dve reči na rastojanju
+    # najviše 1 uvek dele bar jedan takav oblik (FUZZY_EDITS = 1)
+    return [word] + [word[:i] + word[i + 1:] for i in range(len(word))]
+
+def _word_edits(word: str) -> int:
+    return FUZZY_EDITS if len(word) >= FUZZY_MIN_WORD and not word.isdigit() else 0
+
+def _pattern_edits(words: List[str]) -> int:
+    if len(words) == 1 and len(words[0]) < FUZZY_MIN_SINGLE:
+        return 0
+    return FUZZY_EDITS if any(_word_edits(w) for w in words) else 0
+
+# ===== AHO-CORASICK =====
+# (klaster, ulica)
+Owner = Tuple[str, str]
+
+class StreetMatcher:
+    # Automat se gradi jednom od svih varijanti svih posmatranih ulica svih
+    # klastera; svaka linija se normalizuje jednom, tačne varijante se traže
+    # Aho-Corasick automatom po slovima, a približna poklapanja automatom po
+    # rečima — broj varijanti ne množi broj prolaza kroz tekst.
+    def __init__(self, watchlists: Dict[str, Iterable[str]]):
+        self.clusters: Dict[str, List[str]] = {c: list(s) for c, s in watchlists.items()}
+        self.digest = json_hash(list(self.clusters.items()))
+        self._order: Dict[Owner, Tuple[int, int]] = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Owner]] = [[]]
+        # trie reči ulica za približnu pretragu
+        self._wgoto: List[Dict[str, int]] = [{}]
+        self._wword: List[int] = [-1]
+        self._words: List[str] = []
+        # oblici reči ulica sa izbačenim slovom — brzo odbacivanje reči teksta
+        self._deleted: Set[str] = set()
+        self._word_ids: Dict[str, int] = {}
+        # ulica kao niz id-jeva reči: (reči, dozvoljene izmene, vlasnik)
+        self._phrases: List[Tuple[Tuple[int, ...], int, Owner]] = []
+        self._starts: Dict[int, List[int]] = {}
+        self._near: Dict[str, Dict[int, int]] = {}
+
+        for ci, (cluster, streets) in enumerate(self.clusters.items()):
+            for si, street in enumerate(streets):
+                owner = (cluster, street)
+                self._order.setdefault(owner, (ci, si))
+                for pattern in street_variants(street):
+                    self._add(pattern, owner)
+                    self._add_phrase(pattern.split(), owner)
+        self._build()
+
+    def _add(self, pattern: str, owner: Owner) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if owner not in self._out[node]:
+            self._out[node].append(owner)
+
+    def _add_phrase(self, words: List[str], owner: Owner) -> None:
+        edits = _pattern_edits(words)
+        if not edits:
+            return  # tačna poklapanja pokriva Aho-Corasick
+        ids = tuple(self._word_id(w) for w in words)
+        self._starts.setdefault(ids[0], []).append(len(self._phrases))
+        self._phrases.append((ids, edits, owner))
+
+    def _word_id(self, word: str) -> int:
+        wid = self._word_ids.get(word)
+        if wid is not None:
+            return wid
+        wid = self._word_ids[word] = len(self._words)
+        self._words.append(word)
+        self._deleted.update(_deletions(word))
+        node = 0
+        for ch in word:
+            nxt = self._wgoto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._wgoto)
+                self._wgoto[node][ch] = nxt
+                self._wgoto.append({})
+                self._wword.append(-1)
+            node = nxt
+        self._wword[node] = wid
+        return wid
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + [o for o in self._out[self._fail[nxt]] if o not in self._out[nxt]]
+
+    def clear_cache(self) -> None:
+        self._near.clear()
+
+    def near(self, token: str) -> Dict[int, int]:
+        # id reči ulice -> broj izmena do reči teksta (najviše FUZZY_EDITS);
+        # računa se samo dijagonalni pojas širine FUZZY_EDITS, ostalo je "previše"
+        hit = self._near.get(token)
+        if hit is not None:
+            return hit
+        found: Dict[int, int] = {}
+        k, n = FUZZY_EDITS, len(token)
+        over = k + 1
+        wgoto, wword, words = self._wgoto, self._wword, self._words
+        stack = []
+        # većina reči teksta nije ni blizu nijedne ulice; automat se pušta
+        # samo kad reč deli oblik sa izbačenim slovom sa nekom rečju ulice
+        deleted = self._deleted
+        if any(d in deleted for d in _deletions(token)):
+            first = list(range(min(n, k) + 1)) + [over] * (n - min(n, k))
+            stack = [(child, ch, 1, first) for ch, child in wgoto[0].items()]
+        while stack:
+            node, ch, depth, prev = stack.pop()
+            lo, hi = max(1, depth - k), min(n, depth + k)
+            row = [over] * (n + 1)
+            if depth <= k:
+                row[0] = depth
+            best = row[0]
+            for i in range(lo, hi + 1):
+                d = prev[i - 1] + (token[i - 1] != ch)
+                up, left = prev[i] + 1, row[i - 1] + 1
+                if up < d:
+                    d = up
+                if left < d:
+                    d = left
+                row[i] = d if d < over else over
+                if d < best:
+                    best = d
+            wid = wword[node]
+            if wid >= 0 and row[n] <= _word_edits(words[wid]):
+                found[wid] = row[n]
+            if best <= k:
+                stack.extend((child, c, depth + 1, row) for c, child in wgoto[node].items())
+        if len(self._near) >= NEAR_CACHE_SIZE:
+            self._near.clear()
+        self._near[token] = found
+        return found
+
+    def find_normalized(self, ntext: str) -> List[Owner]:
+        # ntext je u obliku norm_line()
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in ntext:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        if self._phrases:
+            self._find_fuzzy(ntext, found)
+        # redosled kao u konfiguraciji (klaster, pa ulica)
+        return sorted(found, key=self._order.__getitem__)
+
+    def _find_fuzzy(self, ntext: str, found: set) -> None:
+        # automat po rečima; stanje je (fraza, sledeća reč, potrošene izmene)
+        phrases, starts, near_cache = self._phrases, self._starts, self._near
+        active: List[Tuple[int, int, int]] = []
+        for token in ntext.split(" "):
+            near = near_cache.get(token)
+            if near is None:
+                near = self.near(token)
+            if not near:
+                active = []
+                continue
+            states = active + [(p, 0, 0) for w in near for p in starts.get(w, ())]
+            active = []
+            for p, pos, used in states:
+                ids, edits, owner = phrases[p]
+                d = near.get(ids[pos])
+                if d is None or used + d > edits:
+                    continue
+                if pos + 1 == len(ids):
+                    found.add(owner)
+                else:
+                    active.append((p, pos + 1, used + d))
+
+    def find(self, text: str) -> List[Owner]:
+        return self.find_normalized(norm_line(text))
+
+# ===== PRETRAGA SNAPSHOTA =====
+# menja se kad se promeni oblik rezultata, da stari memo ne bi bio korišćen
+MATCH_FORMAT = 3
+
+def match_snapshot(snapshot: Snapshot, matcher: StreetMatcher,
+                   store: Optional[SnapshotStore] = None) -> Dict[str, Dict[str, list]]:
+    # rezultat je memoizovan po (heš snapshota, heš liste ulica)
+    memo_key = None
+    if store is not None and snapshot.digest is not None:
+        memo_key = f"{snapshot.digest[:32]}-{matcher.digest[:32]}-v{MATCH_FORMAT}"
+        cached = store.get("matches", memo_key)
+        if cached is not None:
+            METRICS.record("match", memo=True, candidates=0, hits=_count_hits(cached), duration_ms=0.0)
+            return cached
+
+    with METRICS.stage("match", memo=False) as m:
+        results = _match(snapshot, matcher)
+        m["candidates"] = sum(len(rows) for rows in snapshot.eps.values()) + len(snapshot.bvk)
+        m["hits"] = _count_hits(results)
+
+    if memo_key is not None:
+        store.put("matches", memo_key, results)
+    return results
+
+def _count_hits(results: Dict[str, Dict[str, list]]) -> int:
+    return sum(len(d["eps"]) + len(d["bvk"]) for d in results.values())
+
+def _match(snapshot: Snapshot, matcher: StreetMatcher) -> Dict[str, Dict[str, list]]:
+    results: Dict[str, Dict[str, list]] = {c: {"eps": [], "bvk": []} for c in matcher.clusters}
+    intervals: Dict[str, List[Interval]] = {c: [] for c in matcher.clusters}
+
+    for day, rows in snapshot.eps.items():
+        url = snapshot.eps_urls[day]
+        datum = snapshot.eps_date(day)
+        for opstina, vreme, ulice in rows:
+            found = matcher.find(ulice)
+            if not found:
+                continue
+            # jedan pogodak po (klaster, red), bez obzira na broj pogođenih ulica;
+            # "row" je identitet reda za deduplikaciju među klasterima
+            windows = parse_vreme(vreme, datum)
+            row = json_hash([datum, opstina, vreme, ulice])[:16]
+            by_cluster: Dict[str, List[str]] = {}
+            for cluster, street in found:
+                by_cluster.setdefault(cluster, []).append(street)
+            for cluster, streets in by_cluster.items():
+                results[cluster]["eps"].append({
+                    "day": day,
+                    "date": datum,
+                    "opstina": opstina,
+                    "vreme": vreme,
+                    "ulice": ulice,
+                    "url": url,
+                    "match": streets[0],
+                    "matches": streets,
+                    "row": row,
+                    "windows": [w.to_json() for w in windows],
+                })
+                intervals[cluster].extend(windows)
+
+    for raw in snapshot.bvk:
+        for cluster in dict.fromkeys(c for c, _street in matcher.find(raw)):
+            results[cluster]["bvk"].append(raw)
+    for cluster, data in results.items():
+        data["bvk"] = list(dict.fromkeys(data["bvk"]))
+        # spojeni prozori bez struje po klasteru
+        data["windows"] = [w.to_json() for w in merge_intervals(intervals[cluster])]
+    return results
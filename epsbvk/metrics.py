@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+# ===== METRIKE =====
+# Svaka faza (preuzimanje, parsiranje, pretraga, renderovanje, slanje)
+# beleži događaj; na kraju pokretanja događaji idu kao JSON linije, a po
+# želji i kao Prometheus tekstualni format (npr. za node_exporter textfile).
+#   EPS_METRICS=putanja.jsonl   (ili "-" za stdout)
+#   EPS_METRICS_PROM=putanja.prom
+METRICS_PATH = os.getenv("EPS_METRICS", "")
+PROM_PATH = os.getenv("EPS_METRICS_PROM", "")
+
+# Prometheus metrike kao zbir polja događaja: (ime, događaj, polje, labele)
+_PROM = [
+    ("epsbvk_fetch_seconds", "fetch", "duration_ms", ("url", "status")),
+    ("epsbvk_fetch_bytes", "fetch", "bytes", ("url",)),
+    ("epsbvk_parse_seconds", "fetch", "parse_ms", ("url",)),
+    ("epsbvk_fetch_retry_delay_seconds", "fetch_retry", "delay_ms", ("url",)),
+    ("epsbvk_fetch_stale_age_seconds", "fetch_stale", "age_ms", ("url",)),
+    ("epsbvk_extracted_records", "fetch", "records", ("url",)),
+    ("epsbvk_match_seconds", "match", "duration_ms", ()),
+    ("epsbvk_match_candidates", "match", "candidates", ()),
+    ("epsbvk_match_hits", "match", "hits", ()),
+    ("epsbvk_index_seconds", "index", "duration_ms", ()),
+    ("epsbvk_index_records", "index", "records", ()),
+    ("epsbvk_archive_added", "archive", "added", ()),
+    ("epsbvk_render_seconds", "render", "duration_ms", ("tenant",)),
+    ("epsbvk_send_seconds", "send", "duration_ms", ("tenant", "ok")),
+    ("epsbvk_send_attempts", "send", "attempts", ("tenant",)),
+    ("epsbvk_run_seconds", "run", "duration_ms", ()),
+]
+
+def _label(value: Any) -> str:
+    text = str(value).lower() if isinstance(value, bool) else str(value)
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.events: List[Dict[str, Any]] = []
+        self.run_id = os.urandom(6).hex()
+
+    def record(self, event: str, **fields) -> None:
+        with self._lock:
+            self.events.append({"ts": round(time.time(), 3), "run_id": self.run_id, "event": event, **fields})
+
+    @contextmanager
+    def stage(self, event: str, **fields) -> Iterator[Dict[str, Any]]:
+        # polja se mogu dopuniti unutar bloka (npr. broj redova)
+        t0 = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            fields["duration_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            self.record(event, **fields)
+
+    def to_jsonl(self) -> str:
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self.events)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, event, fld, labels in _PROM:
+            series: Dict[str, float] = {}
+            for e in self.events:
+                if e["event"] != event or fld not in e:
+                    continue
+                value = e[fld] / 1000 if fld.endswith("_ms") else e[fld]
+                lbl = ",".join(f'{k}="{_label(e.get(k, ""))}"' for k in labels)
+                series[lbl] = series.get(lbl, 0) + value
+            if not series:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            for lbl, value in series.items():
+                lines.append(f"{name}{{{lbl}}} {value:g}" if lbl else f"{name} {value:g}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def flush(self) -> None:
+        # piše sve dosadašnje događaje i počinje novo pokretanje
+        with self._lock:
+            if not self.events:
+                return
+            try:
+                if METRICS_PATH == "-":
+                    sys.stdout.write(self.to_jsonl())
+                elif METRICS_PATH:
+                    with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                        f.write(self.to_jsonl())
+                if PROM_PATH:
+                    tmp = f"{PROM_PATH}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        f.write(self.to_prometheus())
+                    os.replace(tmp, PROM_PATH)
+            except OSError as e:
+                print(f"⚠️ Greška pri upisu metrika: {e}")
+            self.events = []
+            self.run_id = os.urandom(6).hex()
+
+METRICS = Metrics()
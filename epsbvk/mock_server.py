@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from epsbvk.fixtures import FIXTURES_DIR, synthetic_bvk_html, synthetic_eps_html
+
+# ===== LOKALNI MOCK SERVER =====
+# Zamena za elektrodistribucija.rs i bvk.rs za offline i load testove:
+#   python -m epsbvk.mock_server --port 8765 --rows 2000 --latency 200 --error-rate 0.1
+#   EPS_BASE_URL=http://127.0.0.1:8765/planirana-iskljucenja-beograd/ \
+#   EPS_BVK_URL=http://127.0.0.1:8765/kvarovi-na-mrezi/ python -m epsbvk.engine
+EPS_PATH = re.compile(r"^/planirana-iskljucenja-beograd/(Dan_\d+_Iskljucenja\.htm)$")
+BVK_PATH = "/kvarovi-na-mrezi/"
+
+class MockOptions:
+    def __init__(self, directory: Optional[str] = None, rows: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, error_rate: float = 0, etag: bool = True,
+                 always_304: bool = False, seed: int = 0):
+        self.directory = directory
+        self.rows = rows
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.etag = etag
+        self.always_304 = always_304
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self._pages: Dict[str, bytes] = {}
+
+    def page(self, name: str) -> Optional[bytes]:
+        # stranica iz direktorijuma, inače generisana zadate veličine
+        if name in self._pages:
+            return self._pages[name]
+        body = None
+        if self.directory and os.path.isfile(os.path.join(self.directory, name)):
+            with open(os.path.join(self.directory, name), "rb") as f:
+                body = f.read()
+        elif self.rows:
+            if name == "bvk.html":
+                body = synthetic_bvk_html(self.rows, seed=self.rows).encode("utf-8")
+            else:
+                body = synthetic_eps_html(self.rows, seed=int(name.split("_")[1])).encode("utf-8")
+        if body is not None:
+            self._pages[name] = body
+        return body
+
+def make_handler(opts: MockOptions):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            with opts.lock:
+                delay = opts.latency_ms + opts.rng.uniform(0, opts.jitter_ms)
+                fail = opts.rng.random() < opts.error_rate
+            if delay:
+                time.sleep(delay / 1000)
+            if fail:
+                self._reply(503, b"Service Unavailable")
+                return
+
+            path = self.path.split("?", 1)[0]
+            m = EPS_PATH.match(path)
+            name = m.group(1) if m else ("bvk.html" if path == BVK_PATH else None)
+            body = opts.page(name) if name else None
+            if body is None:
+                self._reply(404, b"Not Found")
+                return
+
+            headers = {"Content-Type": "text/html; charset=utf-8"}
+            if opts.etag:
+                etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+                headers["ETag"] = etag
+                if opts.always_304 or self.headers.get("If-None-Match") == etag:
+                    self._reply(304, headers={"ETag": etag})
+                    return
+            self._reply(200, body, headers)
+
+    return Handler
+
+def serve(host: str = "127.0.0.1", port: int = 8765, opts: Optional[MockOptions] = None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(opts or MockOptions(directory=FIXTURES_DIR)))
+    server.daemon_threads = True
+    return server
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Lokalni mock EPS/BVK server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--dir", default=FIXTURES_DIR, help="direktorijum sa stranicama ('' = bez)")
+    ap.add_argument("--rows", type=int, default=0, help="veličina generisanih stranica kad fajl ne postoji")
+    ap.add_argument("--latency", type=float, default=0, help="kašnjenje po zahtevu (ms)")
+    ap.add_argument("--jitter", type=float, default=0, help="dodatno nasumično kašnjenje do (ms)")
+    ap.add_argument("--error-rate", type=float, default=0, help="udeo odgovora 503 (0–1)")
+    ap.add_argument("--no-etag", action="store_true", help="bez ETag-a (nema 304)")
+    ap.add_argument("--always-304", action="store_true", help="uvek 304 kad postoji ETag")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    opts = MockOptions(directory=args.dir or None, rows=args.rows, latency_ms=args.latency,
+                       jitter_ms=args.jitter, error_rate=args.error_rate, etag=not args.no_etag,
+                       always_304=args.always_304, seed=args.seed)
+    server = serve(args.host, args.port, opts)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"🧪 Mock server: {base}")
+    print(f"   EPS_BASE_URL={base}/planirana-iskljucenja-beograd/")
+    print(f"   EPS_BVK_URL={base}{BVK_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# ===== NORMALIZACIJA =====
+# Tabele se grade jednom pri učitavanju modula. Ćirilica i srpska latinica
+# sa dijakriticima se svode na ASCII jednim str.translate; NFD prolaz se
+# radi samo ako posle toga ostane neki ne-ASCII znak.
+_CYR_LAT = {
+    "А":"A","Б":"B","В":"V","Г":"G","Д":"D","Ђ":"Dj","Е":"E","Ж":"Z","З":"Z","И":"I","Ј":"J","К":"K",
+    "Л":"L","Љ":"Lj","М":"M","Н":"N","Њ":"Nj","О":"O","П":"P","Р":"R","С":"S","Т":"T","Ћ":"C","У":"U",
+    "Ф":"F","Х":"H","Ц":"C","Ч":"C","Џ":"Dz","Ш":"S",
+    "а":"a","б":"b","в":"v","г":"g","д":"d","ђ":"dj","е":"e","ж":"z","з":"z","и":"i","ј":"j","к":"k",
+    "л":"l","љ":"lj","м":"m","н":"n","њ":"nj","о":"o","п":"p","р":"r","с":"s","т":"t","ћ":"c","у":"u",
+    "ф":"f","х":"h","ц":"c","ч":"c","џ":"dz","ш":"s",
+}
+# latinica sa dijakriticima; Đ/đ nema NFD razlaganje pa mora ovde
+_LAT_ASCII = {
+    "Č":"C","Ć":"C","Š":"S","Ž":"Z","Đ":"Dj",
+    "č":"c","ć":"c","š":"s","ž":"z","đ":"dj",
+}
+TOLATIN_TABLE = str.maketrans(_CYR_LAT)
+ASCII_TABLE = str.maketrans({**_CYR_LAT, **_LAT_ASCII})
+_WS = re.compile(r"\s+")
+# za pretragu su crtice, tačke, zarezi i ostalo samo granice reči
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# granice LRU keša normalizovanih oblika
+STREET_CACHE_SIZE = 4096
+LINE_CACHE_SIZE = 8192
+
+def strip_diacritics(s: str) -> str:
+    if s.isascii():
+        return s
+    norm = unicodedata.normalize("NFD", s)
+    return "".join(ch for ch in norm if unicodedata.category(ch) != "Mn")
+
+def tolatin(s: str) -> str:
+    return s.translate(TOLATIN_TABLE)
+
+def norm_text(s: str) -> str:
+    s = strip_diacritics(s.translate(ASCII_TABLE))
+    return _WS.sub(" ", s.lower()).strip()
+
+@lru_cache(maxsize=STREET_CACHE_SIZE)
+def norm_street(s: str) -> str:
+    # ulice i upiti se ponavljaju kroz klastere, tenante i pokretanja
+    return norm_text(s)
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def norm_line(s: str) -> str:
+    # oblik za pretragu: samo reči razdvojene jednim razmakom, pa se
+    # "Kapetan-Mišina", "КАПЕТАН МИШИНА" i "Bul.Despota" porede kao reči;
+    # ista EPS/BVK linija se javlja na više stranica i u svakom watch ciklusu
+    return _NON_WORD.sub(" ", strip_diacritics(s.translate(ASCII_TABLE)).lower()).strip()
@@ -0,0 +1,396 @@
+from datetime import datetime
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+from epsbvk.sources import BVK_URL, Snapshot, day_offset
+from epsbvk.timewindow import Interval, format_interval
+
+# ===== ŠABLONI =====
+# Šabloni se raščlanjuju jednom pri učitavanju modula, zajednički CSS je u
+# konstantama, a kartica istog isključenja (isti red, više klastera/tenanata)
+# se renderuje jednom i uzima iz keša. Izlaz je bajt-identičan ranijem.
+CARD_CACHE_SIZE = 2048
+
+class Fragment:
+    # šablon u str.format sintaksi, raščlanjen na literale i imena polja
+    __slots__ = ("_literals", "_fields")
+
+    def __init__(self, source: str):
+        literals = [""]
+        fields: List[str] = []
+        for literal, name, _spec, _conv in Formatter().parse(source):
+            literals[-1] += literal
+            if name is not None:
+                fields.append(name)
+                literals.append("")
+        self._literals = tuple(literals)
+        self._fields = tuple(fields)
+
+    def __call__(self, **values: object) -> str:
+        lit = self._literals
+        out = [lit[0]]
+        for i, name in enumerate(self._fields, 1):
+            out.append(str(values[name]))
+            out.append(lit[i])
+        return "".join(out)
+
+_CARD = "background:#111826; border:1px solid #1f2a37; border-radius:14px; padding:20px; margin-bottom:16px; color:#e6edf3;"
+_PILL = "display:inline-block; padding:6px 10px; border-radius:999px; font-size:12px; margin-right:8px;"
+_PILL_OK = f'<div style="{_PILL} border:1px solid #1f513f; background:#0e1c16; color:#34d399;">'
+_CHIP = "display:inline-block; font-size:12px; padding:5px 10px; border-radius:999px; background:#243244; color:#e6edf3; margin:2px 6px 2px 0;"
+_NOTE = "font-size:12px; opacity:.8; margin-top:8px;"
+_LINK = "color:#93c5fd;"
+_SECTION_OPEN = f'<div style="{_CARD}">'
+_UL_OPEN = '<ul style="margin:0; padding-left:18px;">'
+
+_DNEVNI_HEAD = Fragment(f"""\
+<!doctype html>
+<html>
+  <head><meta charset="utf-8"><meta name="color-scheme" content="dark light"></head>
+  <body style="font-family:Arial, sans-serif; background:#0b0f14; color:#e6edf3; padding:24px;">
+    <div style="{_CARD}">
+      <div style="font-size:18px; font-weight:600; margin-bottom:6px;">📬 EPS/BVK dnevni izveštaj</div>
+      <div style="opacity:.8; font-size:12px;">{{today}} — Ulice posmatranja: {{streets}}</div>
+      <div style="margin-top:10px; font-size:12px; opacity:.8;">{{joke}}</div>
+    </div>
+""")
+_PILL_EPS_HIT = f'<div style="{_PILL} border:1px solid #5b2121; background:#1a0e0e; color:#f97373;">⚡ Struja: pogodjene ulice</div>'
+_PILL_EPS_OK = f"{_PILL_OK}⚡ Struja: bez planiranih isključenja</div>"
+_PILL_BVK_HIT = f'<div style="{_PILL} border:1px solid #5a441a; background:#1a150a; color:#f59e0b;">🚰 Voda: prijavljeni radovi/kvarovi</div>'
+_PILL_BVK_OK = f"{_PILL_OK}🚰 Voda: nema prijavljenih problema</div>"
+_PILL_WARN = f'<div style="{_PILL} border:1px solid #5a441a; background:#1a150a; color:#f59e0b;">'
+_PILL_EPS_NA = f"{_PILL_WARN}⚡ Struja: podaci nisu potpuni</div>"
+_PILL_BVK_NA = f"{_PILL_WARN}🚰 Voda: podaci nisu potpuni</div>"
+_EPS_CARD = Fragment(f"""
+              <div style="background:#1a2432; border:1px solid #243244; border-radius:12px; padding:14px; margin-bottom:12px; color:#e6edf3;">
+                <div style="margin-bottom:6px;">
+                  <span style="{_CHIP}">{{when}} • {{date}}</span>
+                  <span style="{_CHIP}">Opština: {{opstina}}</span>
+                </div>
+                <div><strong>Vreme:</strong> {{vreme}}</div>
+                <div style="margin-top:6px;"><strong>Ulice:</strong> {{ulice}}</div>
+                <div style="{_NOTE}">Izvor: <a href="{{url}}" style="{_LINK}">{{url}}</a></div>
+              </div>
+            """)
+_BVK_SOURCE = Fragment(f'<div style="{_NOTE}">Izvor: <a href="{{url}}" style="{_LINK}">{{url}}</a></div>')
+_EPS_TEXT = Fragment("• {when} ({date}): {opstina} | {vreme} | {ulice} (izvor: {url})")
+
+_APARTMANI_HEAD = Fragment("""
+<!doctype html>
+<html>
+  <head><meta charset="utf-8"></head>
+  <body style="font-family:Arial, sans-serif; background-color:#0b0f14 !important; color:#e6edf3 !important; padding:24px;">
+    <div style="background-color:#111826 !important; border:1px solid #1f2a37; border-radius:14px; padding:20px; margin-bottom:16px;">
+      <div style="font-size:18px; font-weight:600; margin-bottom:6px; color:#93c5fd !important;">📬 Apartmani — dnevni izveštaj ({date})</div>
+      <div style="opacity:.8; font-size:12px; color:#e6edf3 !important;">{today}</div>
+    </div>
+""")
+_APARTMANI_CLUSTER = Fragment("""
+        <div style="background-color:#111826 !important; border:1px solid #1f2a37; border-radius:14px; padding:20px; margin-bottom:16px; color:#e6edf3 !important;">
+          <div style="font-weight:600; margin-bottom:6px; font-size:16px; color:#ff6b6b !important;">🏠 Okolina: {adresa}</div>
+        """)
+_APARTMANI_EPS = Fragment("""
+                  <div style="margin-bottom:8px; color:#e6edf3 !important;">
+                    <div><strong>Ulica pogođena:</strong> {match}</div>
+                    <div>{date} ({day}), {opstina} — {vreme}</div>
+                    <div><a href="{url}" style="color:#93c5fd !important;">izvor</a></div>
+                  </div>
+                """)
+_LI = 'style="color:#e6edf3 !important;"'
+_APARTMANI_BVK = Fragment(f'<li {_LI}>{{raw}} <a href="{{url}}" style="color:#93c5fd !important;">izvor</a></li>')
+
+def day_label(day: str) -> str:
+    # "danas" -> DANAS, "sutra" -> SUTRA, "dan3" -> ZA 3 DANA, "novi-sad/danas" -> NOVI SAD • DANAS
+    region, _, name = day.rpartition("/")
+    if name == "danas":
+        label = "DANAS"
+    elif name == "sutra":
+        label = "SUTRA"
+    else:
+        label = f"ZA {day_offset(name)} DANA"
+    return f"{region.replace('-', ' ').upper()} • {label}" if region else label
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _eps_card(day: str, date: str, opstina: str, vreme: str, ulice: str, url: str) -> str:
+    when = day_label(day)
+    return _EPS_CARD(when=when, date=date, opstina=opstina, vreme=vreme, ulice=ulice, url=url)
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _eps_text(day: str, date: str, opstina: str, vreme: str, ulice: str, url: str) -> str:
+    when = day_label(day)
+    return _EPS_TEXT(when=when, date=date, opstina=opstina, vreme=vreme, ulice=ulice, url=url)
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _apartmani_eps(match: str, date: str, day: str, opstina: str, vreme: str, url: str) -> str:
+    return _APARTMANI_EPS(match=match, date=date, day=day, opstina=opstina, vreme=vreme, url=url)
+
+def clear_card_cache() -> None:
+    # benchmark meri renderovanje bez kartica iz ranijih ponavljanja
+    for cached in (_eps_card, _eps_text, _apartmani_eps):
+        cached.cache_clear()
+
+def _matched(h: Dict) -> str:
+    # sve pogođene ulice klastera u jednom redu (jedan pogodak po redu)
+    return ", ".join(h.get("matches") or [h["match"]])
+
+def _row_id(h: Dict) -> str:
+    # pogoci iz starijeg stanja nemaju "row"
+    return h.get("row") or "\x1f".join((h["date"], h["opstina"], h["vreme"], h["ulice"]))
+
+def _eps_key(h: Dict[str, str]) -> Tuple[str, str, str, str, str, str]:
+    return h["day"], h["date"], h["opstina"], h["vreme"], h["ulice"], h["url"]
+
+# ===== NEDOSTUPNI IZVORI =====
+# izvor ("eps"/"bvk") -> napomene o stranicama koje u ovom pokretanju nisu
+# sveže preuzete; bez njih bi "nema isključenja" značilo i "izvor je pao"
+Status = Dict[str, List[str]]
+
+def source_status(snapshot: Snapshot) -> Status:
+    status: Status = {"eps": [], "bvk": []}
+    for key in sorted(set(snapshot.errors) | set(snapshot.stale)):
+        source = "bvk" if key == "bvk" else "eps"
+        label = "BVK" if key == "bvk" else day_label(key.split(":", 1)[-1])
+        if key in snapshot.errors:
+            status[source].append(f"{label}: podaci nisu dostupni")
+        else:
+            checked = datetime.fromtimestamp(snapshot.stale[key])
+            status[source].append(f"{label}: izvor nedostupan, podaci od {checked:%d.%m. %H:%M}")
+    return status
+
+def _status_html(notes: List[str]) -> str:
+    return "".join(f'<div style="{_NOTE} color:#f59e0b;">⚠️ {n}</div>' for n in notes)
+
+# ===== DNEVNI IZVEŠTAJ (HTML + TXT) =====
+def build_subject(eps_hits: List[Dict[str, str]], bvk_hits: List[str]) -> str:
+    has_eps = len(eps_hits) > 0
+    has_bvk = len(bvk_hits) > 0
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    if not has_eps and not has_bvk:
+        return f"🎉 Danas {today}: nema problema sa strujom ni vodom — sve radi!"
+    if has_eps and has_bvk:
+        return f"⚡🚰 Danas {today}: isključenja struje + problemi sa vodom"
+    if has_eps and not has_bvk:
+        return f"⚡ Danas {today}: planirana isključenja struje"
+    return f"🚰 Danas {today}: kvarovi / obaveštenja o vodi"
+
+def build_html_body(eps_hits: List[Dict[str, str]], bvk_hits: List[str], streets: List[str],
+                    otkazano: Optional[Dict[str, list]] = None, status: Optional[Status] = None) -> str:
+    status = status or {"eps": [], "bvk": []}
+    header_joke = "☕ Ako danas nestane struje — bar neće kofeina. 🙂"
+    if not eps_hits and not bvk_hits and not status["eps"] and not status["bvk"]:
+        header_joke = "🎊 Sve radi! Idealno vreme da uključimo mašinu za veš *i* espreso."
+
+    html = [_DNEVNI_HEAD(today=datetime.now().strftime("%A, %d.%m.%Y."),
+                         streets=" • ".join(streets), joke=header_joke)]
+    html.append(_PILL_EPS_HIT if eps_hits else _PILL_EPS_NA if status["eps"] else _PILL_EPS_OK)
+    html.append(_PILL_BVK_HIT if bvk_hits else _PILL_BVK_NA if status["bvk"] else _PILL_BVK_OK)
+    html.append("<br><br>")
+
+    # EPS
+    html.append(_SECTION_OPEN)
+    html.append('<div style="font-weight:600;margin-bottom:6px;">⚡ EPS (struja)</div>')
+    if eps_hits:
+        html.extend(_eps_card(*_eps_key(h)) for h in eps_hits)
+        html.append(f'<div style="{_NOTE}">Tip: napunite baterije i skuvajte kafu unapred. ☕🔋</div>')
+    elif status["eps"]:
+        html.append('<div>Nema pogodaka u dostupnim podacima — EPS podaci nisu potpuni.</div>')
+    else:
+        html.append('<div>✅ Nema planiranih isključenja za tražene ulice.</div>')
+    html.append(_status_html(status["eps"]))
+    html.append("</div>")
+
+    # BVK
+    html.append(_SECTION_OPEN)
+    html.append('<div style="font-weight:600;margin-bottom:6px;">🚰 BVK (voda)</div>')
+    if bvk_hits:
+        html.append(_UL_OPEN)
+        html.extend(f"<li>{raw}</li>" for raw in bvk_hits)
+        html.append("</ul>")
+        html.append(_BVK_SOURCE(url=BVK_URL))
+        html.append(f'<div style="{_NOTE}">Tip: napunite bokale — za svaki slučaj. 💧</div>')
+    elif status["bvk"]:
+        html.append('<div>Nema pogodaka u dostupnim podacima — BVK podaci nisu potpuni.</div>')
+    else:
+        html.append('<div>✅ Nema prijavljenih isključenja/kvarova vode za tražene ulice.</div>')
+    html.append(_status_html(status["bvk"]))
+    html.append("</div>")
+
+    # otkazano / rešeno od prošlog izveštaja (diff režim)
+    if otkazano and (otkazano["eps"] or otkazano["bvk"]):
+        html.append(_SECTION_OPEN)
+        html.append('<div style="font-weight:600;margin-bottom:6px;">✅ Otkazano / rešeno</div>')
+        html.append(_UL_OPEN)
+        for h in otkazano["eps"]:
+            html.append(f"<li><s>⚡ {h['date']} • {h['opstina']} • {h['vreme']} • {h['ulice']}</s></li>")
+        for raw in otkazano["bvk"]:
+            html.append(f"<li><s>🚰 {raw}</s></li>")
+        html.append("</ul>")
+        html.append("</div>")
+
+    html.append("</body></html>")
+    return "".join(html)
+
+def build_text_body(eps_hits: List[Dict[str, str]], bvk_hits: List[str], streets: List[str],
+                    otkazano: Optional[Dict[str, list]] = None, status: Optional[Status] = None) -> str:
+    status = status or {"eps": [], "bvk": []}
+    lines = []
+    lines.append(f"EPS/BVK dnevni izveštaj — {datetime.now().strftime('%A, %d.%m.%Y.')}")
+    lines.append(f"Ulice posmatranja: {', '.join(streets)}")
+    lines.append("")
+    lines.append("⚡ EPS (struja)")
+    if eps_hits:
+        lines.extend(_eps_text(*_eps_key(h)) for h in eps_hits)
+    elif status["eps"]:
+        lines.append("• Nema pogodaka u dostupnim podacima — EPS podaci nisu potpuni.")
+    else:
+        lines.append("• Nema planiranih isključenja za tražene ulice.")
+    lines.extend(f"⚠️ {n}" for n in status["eps"])
+    lines.append("")
+    lines.append("🚰 BVK (voda)")
+    if bvk_hits:
+        lines.extend(f"• {raw} (izvor: {BVK_URL})" for raw in bvk_hits)
+    elif status["bvk"]:
+        lines.append("• Nema pogodaka u dostupnim podacima — BVK podaci nisu potpuni.")
+    else:
+        lines.append("• Nema prijavljenih isključenja/kvarova vode za tražene ulice.")
+    lines.extend(f"⚠️ {n}" for n in status["bvk"])
+    lines.append("")
+    if otkazano and (otkazano["eps"] or otkazano["bvk"]):
+        lines.append("✅ Otkazano / rešeno")
+        for h in otkazano["eps"]:
+            lines.append(f"• ⚡ {h['date']}: {h['opstina']} | {h['vreme']} | {h['ulice']}")
+        for raw in otkazano["bvk"]:
+            lines.append(f"• 🚰 {raw}")
+        lines.append("")
+    return "\n".join(lines)
+
+# ===== APARTMANI IZVEŠTAJ =====
+def build_apartmani_html_body(results: dict, status: Optional[Status] = None) -> str:
+    now = datetime.now()
+    html = [_APARTMANI_HEAD(date=now.strftime("%d.%m.%Y"), today=now.strftime("%A, %d.%m.%Y."))]
+    notes = (status or {}).get("eps", []) + (status or {}).get("bvk", [])
+    if notes:
+        # izveštaj pokriva samo dostupne podatke
+        html.append('<div style="background-color:#1a150a !important; border:1px solid #5a441a; '
+                    'border-radius:14px; padding:14px 20px; margin-bottom:16px;">')
+        html.append(_status_html(notes))
+        html.append("</div>")
+
+    # Dodajemo SAMO one apartmane gde ima pogodaka
+    for adresa, data in results.items():
+        otkazano = data.get("otkazano", {"eps": [], "bvk": []})
+        if not data["eps"] and not data["bvk"] and not otkazano["eps"] and not otkazano["bvk"]:
+            continue  # preskačemo ceo apartman ako nema ništa
+
+        html.append(_APARTMANI_CLUSTER(adresa=adresa))
+
+        # EPS deo
+        if data["eps"]:
+            html.append('<div style="font-weight:600; margin-bottom:6px; color:#f97373 !important;">⚡ EPS isključenja:</div>')
+            html.extend(_apartmani_eps(_matched(h), h["date"], h["day"], h["opstina"], h["vreme"], h["url"])
+                        for h in data["eps"])
+        # BVK deo
+        if data["bvk"]:
+            html.append('<div style="font-weight:600; margin-top:10px; margin-bottom:6px; color:#f59e0b !important;">🚰 BVK kvarovi/radovi:</div><ul>')
+            html.extend(_APARTMANI_BVK(raw=raw, url=BVK_URL) for raw in data["bvk"])
+            html.append("</ul>")
+        # otkazano od prošlog izveštaja (diff režim)
+        if otkazano["eps"] or otkazano["bvk"]:
+            html.append('<div style="font-weight:600; margin-top:10px; margin-bottom:6px; color:#34d399 !important;">✅ Otkazano / rešeno:</div><ul>')
+            for h in otkazano["eps"]:
+                html.append(f'<li {_LI}><s>{h["match"]} — {h["date"]}, {h["opstina"]} — {h["vreme"]}</s></li>')
+            for raw in otkazano["bvk"]:
+                html.append(f"<li {_LI}><s>{raw}</s></li>")
+            html.append("</ul>")
+
+        html.append("</div>")  # zatvaranje card-a za adresu
+
+    html.append("</body></html>")
+    return "".join(html)
+
+def print_apartmani_summary(results: dict, status: Optional[Status] = None) -> None:
+    status = status or {"eps": [], "bvk": []}
+    print("\n===== REZIME =====")
+    for note in status["eps"] + status["bvk"]:
+        print(f"⚠️ {note}")
+    for adresa, data in results.items():
+        print(f"\n🏠 Okolina: {adresa}")
+        if data["eps"]:
+            print("  ⚡ EPS isključenja:")
+            for hit in data["eps"]:
+                print(f"    - {_matched(hit)} | {hit['date']} ({hit['day']}) | {hit['opstina']} | {hit['vreme']}")
+            windows = [Interval.from_json(w) for w in data.get("windows", [])]
+            if windows:
+                print("  ⏱️ Bez struje: " + ", ".join(
+                    f"{iv.start.strftime('%d.%m.')} {format_interval(iv)}" for iv in windows))
+        elif status["eps"]:
+            print("  ⚠️ Nema pogodaka, ali EPS podaci nisu potpuni")
+        else:
+            print("  ✅ Nema isključenja struje")
+        if data["bvk"]:
+            print("  🚰 BVK kvarovi/radovi:")
+            for hit in data["bvk"]:
+                print(f"    - {hit}")
+        elif status["bvk"]:
+            print("  ⚠️ Nema pogodaka, ali BVK podaci nisu potpuni")
+        else:
+            print("  ✅ Nema prijavljenih kvarova vode")
+        for hit in data.get("otkazano", {}).get("eps", []):
+            print(f"  ✅ Otkazano: {hit['match']} | {hit['date']} | {hit['opstina']} | {hit['vreme']}")
+        for hit in data.get("otkazano", {}).get("bvk", []):
+            print(f"  ✅ Rešeno: {hit}")
+    print("\n===== KRAJ REZIMEA =====\n")
+
+# ===== IZVEŠTAJI PO VRSTI =====
+# (subject, html, text) ili None kad nema šta da se pošalje
+Report = Optional[Tuple[str, str, str]]
+
+def _otkazano(results: dict) -> Dict[str, list]:
+    otkazano: Dict[str, list] = {"eps": [], "bvk": []}
+    for data in results.values():
+        if "otkazano" in data:
+            otkazano["eps"].extend(data["otkazano"]["eps"])
+            otkazano["bvk"].extend(data["otkazano"]["bvk"])
+    otkazano["bvk"] = list(dict.fromkeys(otkazano["bvk"]))
+    return otkazano
+
+def dnevni_report(clusters: Dict[str, List[str]], results: dict, status: Optional[Status] = None) -> Report:
+    # svaki klaster je jedan upit; pogoci se nižu redom upita
+    streets = [s for names in clusters.values() for s in names]
+    eps_hits: List[Dict[str, str]] = []
+    bvk_hits: List[str] = []
+    rows = set()
+    for query, data in results.items():
+        for h in data["eps"]:
+            # isti red pogođen preko više upita prikazuje se jednom
+            if _row_id(h) not in rows:
+                rows.add(_row_id(h))
+                eps_hits.append(dict(h, query=query))
+        bvk_hits.extend(data["bvk"])
+    # uniq BVK linije
+    bvk_hits = list(dict.fromkeys(bvk_hits))
+    otkazano = _otkazano(results)
+
+    if not eps_hits and not bvk_hits and not otkazano["eps"] and not otkazano["bvk"]:
+        return None
+    return (
+        build_subject(eps_hits, bvk_hits),
+        build_html_body(eps_hits, bvk_hits, streets, otkazano, status),
+        build_text_body(eps_hits, bvk_hits, streets, otkazano, status),
+    )
+
+def apartmani_report(clusters: Dict[str, List[str]], results: dict, status: Optional[Status] = None) -> Report:
+    print_apartmani_summary(results, status)
+    otkazano = _otkazano(results)
+    if not any(data["eps"] or data["bvk"] for data in results.values()) \
+            and not otkazano["eps"] and not otkazano["bvk"]:
+        return None
+    subject = f"📬 Apartmani — izveštaj {datetime.now().strftime('%Y-%m-%d')}"
+    return subject, build_apartmani_html_body(results, status), ""
+
+REPORTS = {
+    "dnevni": dnevni_report,
+    "apartmani": apartmani_report,
+}
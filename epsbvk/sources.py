@@ -0,0 +1,303 @@
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+from urllib.parse import urljoin
+
+from epsbvk.config import load_config
+from epsbvk.httpcache import CACHE_DIR, HttpCache
+from epsbvk.store import default_store, json_hash
+
+# requests, fetcher i HTML parseri se učitavaju tek kad zatrebaju, pa putevi
+# bez mreže (upit nad kešom, --help) ne plaćaju njihov uvoz
+if TYPE_CHECKING:
+    import requests
+
+    from epsbvk.extract import EpsRow
+    from epsbvk.fetcher import Fetched, Fetcher, Parser
+
+# ===== KONFIGURACIJA =====
+# Izvori su zamenljivi: EPS_BASE_URL/EPS_BVK_URL upućuju na drugi server
+# (npr. lokalni mock: python -m epsbvk.mock_server), a EPS_REPLAY_DIR čita
+# snimljene stranice sa diska preko file:// bez mreže.
+EPS_BASE_URL = os.getenv("EPS_BASE_URL", "https://elektrodistribucija.rs/planirana-iskljucenja-beograd/")
+BVK_URL = os.getenv("EPS_BVK_URL", "https://www.bvk.rs/kvarovi-na-mrezi/#toggle-id-1")
+REPLAY_DIR = os.getenv("EPS_REPLAY_DIR", "")
+if REPLAY_DIR:
+    EPS_BASE_URL = Path(REPLAY_DIR).resolve().as_uri() + "/"
+    BVK_URL = Path(REPLAY_DIR, "bvk.html").resolve().as_uri()
+
+EPS_URLS = {
+    "danas": urljoin(EPS_BASE_URL, "Dan_0_Iskljucenja.htm"),
+    "sutra": urljoin(EPS_BASE_URL, "Dan_1_Iskljucenja.htm"),
+}
+
+# pomeraj u danima u odnosu na dan preuzimanja
+DAY_OFFSETS = {"danas": 0, "sutra": 1}
+
+# ===== REGISTAR EPS STRANICA =====
+# config.json "sources" navodi regione i broj dana; ključ stranice je
+# "danas"/"sutra"/"dan<N>" za Beograd (kao ranije) i "<region>/<dan>" za
+# ostale regione. Stranica koja vrati 404 još nije objavljena i preskače se.
+DEFAULT_REGION = "beograd"
+
+def page_key(region: str, offset: int) -> str:
+    day = next((d for d, o in DAY_OFFSETS.items() if o == offset), f"dan{offset}")
+    return day if region == DEFAULT_REGION else f"{region}/{day}"
+
+def day_offset(key: str) -> int:
+    day = key.rsplit("/", 1)[-1]
+    if day in DAY_OFFSETS:
+        return DAY_OFFSETS[day]
+    return int(day[3:]) if day.startswith("dan") and day[3:].isdigit() else 0
+
+def page_region(key: str) -> str:
+    return key.split("/", 1)[0] if "/" in key else DEFAULT_REGION
+
+def eps_pages(regions: Optional[Dict[str, str]] = None, days: Optional[int] = None) -> Dict[str, str]:
+    # ključ stranice -> URL za sve regione i dane iz konfiguracije
+    if regions is None or days is None:
+        sources = load_config().sources
+        regions = sources.eps_regions if regions is None else regions
+        days = sources.eps_days if days is None else days
+    regions = regions or {DEFAULT_REGION: "./"}
+    return {
+        page_key(region, offset): urljoin(urljoin(EPS_BASE_URL, base), f"Dan_{offset}_Iskljucenja.htm")
+        for region, base in regions.items()
+        for offset in range(days)
+    }
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/124.0.0.0 Safari/537.36"
+}
+
+# rok po pokušaju; ponovljeni pokušaji staju u ukupni rok
+TIMEOUT = 10
+# ukupni rok za sve stranice jednog pokretanja (sekunde)
+DEADLINE = 25
+# najstariji BVK sadržaj koji se koristi kad stranica ne odgovori (sekunde);
+# EPS stranice važe za određeni dan, pa samo sadržaj potvrđen istog dana
+STALE_MAX_AGE = 6 * 3600
+# stranice se skidaju i parsiraju u nitima (streaming parser radi dok telo stiže);
+# broj niti prati broj jezgara, a paralelne veze po hostu su ograničene
+MAX_WORKERS = int(os.getenv("EPS_MAX_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+PER_HOST = int(os.getenv("EPS_PER_HOST", "4"))
+
+# ===== EPS STRUJA =====
+def parse_eps_html(html: str) -> List["EpsRow"]:
+    from epsbvk.extract import EpsTableExtractor
+
+    parser = EpsTableExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.result()
+
+def parse_eps_response(resp: "requests.Response", chunks: Optional[Iterable[bytes]] = None) -> List["EpsRow"]:
+    from epsbvk.extract import EpsTableExtractor, stream_extract
+    from epsbvk.fetcher import CHUNK_SIZE
+
+    # stranica greške nije "nema isključenja"
+    resp.raise_for_status()
+    if chunks is None:
+        chunks = resp.iter_content(CHUNK_SIZE)
+    return stream_extract(chunks, "utf-8", EpsTableExtractor())
+
+def load_eps_data(url: str, fetcher: Optional["Fetcher"] = None) -> List["EpsRow"]:
+    # uz ponovljene pokušaje i poslednje dobre podatke istog dana kad EPS ne
+    # odgovori; bez upotrebljivih podataka izuzetak, ne prazna lista
+    return [tuple(r) for r in fetch_page(url, parse_eps_response, same_day=True, fetcher=fetcher).data]
+
+# ===== BVK VODA =====
+def parse_bvk_html(html: str) -> List[str]:
+    from epsbvk.extract import BvkItemsExtractor
+
+    parser = BvkItemsExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.result()
+
+def parse_bvk_response(resp: "requests.Response", chunks: Optional[Iterable[bytes]] = None) -> List[str]:
+    from epsbvk.extract import BvkItemsExtractor, stream_extract
+    from epsbvk.fetcher import CHUNK_SIZE
+
+    resp.raise_for_status()
+    if chunks is None:
+        chunks = resp.iter_content(CHUNK_SIZE)
+    # bez charset-a u zaglavlju requests pretpostavlja ISO-8859-1; stranica je UTF-8
+    ctype = resp.headers.get("Content-Type", "")
+    encoding = resp.encoding if "charset" in ctype.lower() and resp.encoding else "utf-8"
+    return stream_extract(chunks, encoding, BvkItemsExtractor())
+
+def fetch_bvk_items(url: str, fetcher: Optional["Fetcher"] = None) -> List[str]:
+    # kao load_eps_data(): zastareli podaci najviše STALE_MAX_AGE, inače izuzetak
+    return fetch_page(url, parse_bvk_response, same_day=False, fetcher=fetcher).data
+
+# ===== SNAPSHOT =====
+# Jedan snapshot po pokretanju: svaka stranica se preuzme i parsira tačno
+# jednom, a sve ulice i klasteri se zatim traže nad podacima u memoriji.
+@dataclass
+class Snapshot:
+    eps: Dict[str, List["EpsRow"]] = field(default_factory=dict)
+    eps_urls: Dict[str, str] = field(default_factory=dict)
+    bvk: List[str] = field(default_factory=list)
+    bvk_url: str = BVK_URL
+    fetched_at: datetime = field(default_factory=datetime.now)
+    # heš sadržaja svake stranice ("eps:<dan>", "bvk")
+    hashes: Dict[str, str] = field(default_factory=dict)
+    # stranice koje nisu odgovorile pa su uzeti poslednji dobri podaci:
+    # ključ -> kada je sadržaj poslednji put potvrđen (unix vreme)
+    stale: Dict[str, float] = field(default_factory=dict)
+    # stranice bez ikakvih podataka: ključ -> greška
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def eps_date(self, day: str) -> str:
+        return (self.fetched_at + timedelta(days=day_offset(day))).strftime("%Y-%m-%d")
+
+    @property
+    def digest(self) -> Optional[str]:
+        # heš celog snapshota; None ako neka stranica nema heš (ručno sastavljen)
+        if set(self.hashes) != {f"eps:{d}" for d in self.eps} | {"bvk"}:
+            return None
+        days = [(d, self.eps_urls.get(d), self.eps_date(d)) for d in self.eps]
+        return json_hash({"hashes": self.hashes, "days": days, "bvk_url": self.bvk_url})
+
+def make_fetcher() -> "Fetcher":
+    from epsbvk.fetcher import Fetcher
+
+    # prazan EPS_CACHE_DIR isključuje keš između pokretanja
+    cache = HttpCache(CACHE_DIR) if CACHE_DIR else None
+    return Fetcher(headers=HEADERS, timeout=TIMEOUT, max_workers=MAX_WORKERS,
+                   per_host=PER_HOST, deadline=DEADLINE, cache=cache, store=default_store())
+
+def take_snapshot(eps_urls: Optional[Dict[str, str]] = None, bvk_url: str = BVK_URL,
+                  fetcher: Optional["Fetcher"] = None) -> Snapshot:
+    eps_urls = dict(eps_pages() if eps_urls is None else eps_urls)
+    snap = Snapshot(bvk_url=bvk_url)
+
+    own = fetcher is None
+    fetcher = make_fetcher() if own else fetcher
+    try:
+        # sve EPS stranice i BVK stranica se skidaju istovremeno
+        jobs = {("eps", day): (url, parse_eps_response) for day, url in eps_urls.items()}
+        jobs[("bvk", None)] = (bvk_url, parse_bvk_response)
+        results = fetcher.fetch_all(jobs)
+    finally:
+        if own:
+            fetcher.close()
+
+    missing = 0
+    for day, url in eps_urls.items():
+        key = f"eps:{day}"
+        res = _usable(results[("eps", day)], snap.fetched_at, same_day=True)
+        if not_published(res):
+            missing += 1
+            continue
+        snap.eps_urls[day] = url
+        if isinstance(res, BaseException):
+            print(f"⚠️ EPS greška ({day}): {res}")
+            snap.eps[day] = []
+            snap.errors[key] = str(res)
+            continue
+        # iz JSON store-a redovi stižu kao liste
+        snap.eps[day] = [tuple(r) for r in res.data]
+        snap.hashes[key] = res.digest
+        _mark_stale(snap, key, res)
+
+    if missing:
+        print(f"ℹ️ {missing} EPS stranica još nije objavljeno (404)")
+
+    res = _usable(results[("bvk", None)], snap.fetched_at, same_day=False)
+    if isinstance(res, BaseException):
+        # BVK greška više ne obara pokretanje; EPS deo izveštaja ide normalno
+        print(f"⚠️ BVK greška: {res}")
+        snap.errors["bvk"] = str(res)
+    else:
+        snap.hashes["bvk"], snap.bvk = res.digest, res.data
+        _mark_stale(snap, "bvk", res)
+    return snap
+
+def not_published(res: Union["Fetched", BaseException]) -> bool:
+    import requests
+
+    resp = getattr(res, "response", None)
+    return isinstance(res, requests.HTTPError) and resp is not None and resp.status_code == 404
+
+def _usable(res: Union["Fetched", BaseException], now: datetime,
+            same_day: bool) -> Union["Fetched", BaseException]:
+    # zastareli podaci se koriste samo dok su smisleni za trenutak "now":
+    # EPS stranica istog dana, BVK najviše STALE_MAX_AGE
+    if isinstance(res, BaseException) or not res.stale:
+        return res
+    checked = datetime.fromtimestamp(res.checked_at or 0)
+    if same_day and checked.date() != now.date():
+        return TimeoutError(f"izvor nedostupan, poslednji podaci od {checked:%d.%m. %H:%M}")
+    if not same_day and (now - checked).total_seconds() > STALE_MAX_AGE:
+        return TimeoutError(f"izvor nedostupan, poslednji podaci od {checked:%d.%m. %H:%M}")
+    return res
+
+def fetch_page(url: str, parse: "Parser", same_day: bool, fetcher: Optional["Fetcher"] = None) -> "Fetched":
+    # jedna stranica sa istim pravilima kao take_snapshot(); Fetched.stale
+    # govori pozivaocu da su podaci poslednji dobri, a ne sveži
+    own = fetcher is None
+    fetcher = make_fetcher() if own else fetcher
+    try:
+        until = time.monotonic() + DEADLINE
+        try:
+            res = fetcher.fetch_resilient(url, parse, until)
+        except Exception as e:
+            res = e
+    finally:
+        if own:
+            fetcher.close()
+    res = _usable(res, datetime.now(), same_day)
+    if isinstance(res, BaseException):
+        raise res
+    if res.stale:
+        print(f"⚠️ {url}: izvor nedostupan — koristim podatke od "
+              f"{datetime.fromtimestamp(res.checked_at or 0):%d.%m. %H:%M} (zastarelo)")
+    return res
+
+def _mark_stale(snap: Snapshot, key: str, res: "Fetched") -> None:
+    if res.stale:
+        snap.stale[key] = res.checked_at or 0.0
+        print(f"⚠️ {key}: izvor nedostupan — koristim podatke od "
+              f"{datetime.fromtimestamp(snap.stale[key]):%d.%m. %H:%M} (zastarelo)")
+
+def cached_snapshot(eps_urls: Optional[Dict[str, str]] = None, bvk_url: str = BVK_URL) -> Snapshot:
+    # poslednji preuzeti sadržaj iz HTTP keša i store-a, bez mreže i bez
+    # uvoza requests-a; važe ista pravila zastarelosti kao kad izvor ne odgovori
+    eps_urls = dict(eps_pages() if eps_urls is None else eps_urls)
+    snap = Snapshot(bvk_url=bvk_url)
+    cache = HttpCache(CACHE_DIR) if CACHE_DIR else None
+    store = default_store()
+
+    def load(url: str, kind: str, max_age: Optional[float]) -> Optional[tuple]:
+        entry = cache.load(url) if cache is not None else None
+        if entry is None or store is None:
+            return None
+        checked_at = entry.get("checked_at", entry.get("stored_at", 0))
+        checked = datetime.fromtimestamp(checked_at)
+        if max_age is None and checked.date() != snap.fetched_at.date():
+            return None
+        if max_age is not None and time.time() - checked_at > max_age:
+            return None
+        data = store.get(kind, entry["sha256"])
+        return None if data is None else (entry["sha256"], data, checked_at)
+
+    for day, url in eps_urls.items():
+        got = load(url, parse_eps_response.__name__, None)
+        if got is None:
+            continue
+        snap.eps_urls[day] = url
+        snap.hashes[f"eps:{day}"], rows, snap.stale[f"eps:{day}"] = got
+        snap.eps[day] = [tuple(r) for r in rows]
+    got = load(bvk_url, parse_bvk_response.__name__, STALE_MAX_AGE)
+    if got is not None:
+        snap.hashes["bvk"], snap.bvk, snap.stale["bvk"] = got
+    else:
+        snap.errors["bvk"] = "nema BVK podataka u kešu"
+    return snap
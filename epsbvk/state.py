@@ -0,0 +1,154 @@
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+from epsbvk.index import split_bvk_streets
+from epsbvk.normalize import norm_street
+from epsbvk.sources import Snapshot
+from epsbvk.timewindow import hit_intervals, merge_intervals
+
+# ===== STANJE PRIJAVLJENIH ISKLJUČENJA =====
+# Pamtimo šta je već poslato, pa svako pokretanje javlja samo nova,
+# izmenjena i otkazana isključenja umesto celog izveštaja iznova.
+STATE_DIR = os.getenv("EPS_STATE_DIR", os.path.join(".cache", "state"))
+# EPS_DIFF=0 vraća stari režim (ceo izveštaj svaki put)
+DIFF_ENABLED = os.getenv("EPS_DIFF", "1") != "0"
+
+# zapis: {"cluster", "source", "date", "fingerprint", "hit"}
+Record = Dict[str, Any]
+
+def _identity(rec: Record) -> List[str]:
+    # stabilan identitet zapisa — bez vremena i brojeva, pa izmena reda
+    # (produženo isključenje, drugi brojevi) ostaje isti zapis
+    h = rec["hit"]
+    if rec["source"] == "bvk":
+        # "Стари град: Таковска од броја 12 до 20" -> opština i imena ulica
+        opstina, sep, _rest = h.partition(":")
+        streets = ",".join(norm_street(street) for street, _numbers in split_bvk_streets(h))
+        return [rec["cluster"], "bvk", "", norm_street(opstina) if sep else "", streets]
+    return [rec["cluster"], "eps", h["date"], h["opstina"], h["match"]]
+
+def fingerprint(rec: Record) -> str:
+    # sadržaj zapisa; promena uz isti identitet je "izmenjeno"
+    h = rec["hit"]
+    return h if rec["source"] == "bvk" else json.dumps([h["vreme"], h["ulice"]], ensure_ascii=False)
+
+def keyed(records: Iterable[Record]) -> Dict[str, Record]:
+    # više redova sa istim identitetom (isti dan, opština i ulica — npr.
+    # "ТАКОВСКА: 1-9" i "Насеље X: ТАКОВСКА: 40-60") dobijaju redni broj
+    # po redosledu na stranici
+    out: Dict[str, Record] = {}
+    seen: Dict[str, int] = {}
+    for rec in records:
+        ident = json.dumps(_identity(rec), ensure_ascii=False)
+        n = seen.get(ident, 0)
+        seen[ident] = n + 1
+        out[json.dumps(_identity(rec) + [n], ensure_ascii=False)] = dict(rec, fingerprint=fingerprint(rec))
+    return out
+
+def results_records(results: Dict[str, Dict[str, list]]) -> Dict[str, Record]:
+    def records() -> Iterator[Record]:
+        for cluster, data in results.items():
+            for h in data["eps"]:
+                yield {"cluster": cluster, "source": "eps", "date": h["date"], "hit": h}
+            for raw in data["bvk"]:
+                yield {"cluster": cluster, "source": "bvk", "date": "", "hit": raw}
+    return keyed(records())
+
+@dataclass
+class Diff:
+    added: List[Record] = field(default_factory=list)
+    changed: List[Record] = field(default_factory=list)
+    cancelled: List[Record] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.cancelled)
+
+    def results(self, clusters: List[str]) -> Dict[str, Dict[str, Any]]:
+        # isti oblik kao match_snapshot(), samo sa novim/izmenjenim pogocima,
+        # njihovim spojenim prozorima i dodatnim "otkazano" listama
+        def empty() -> Dict[str, Any]:
+            return {"eps": [], "bvk": [], "otkazano": {"eps": [], "bvk": []}}
+
+        out = {c: empty() for c in clusters}
+        for rec in self.added + self.changed:
+            out.setdefault(rec["cluster"], empty())[rec["source"]].append(rec["hit"])
+        for rec in self.cancelled:
+            out.setdefault(rec["cluster"], empty())["otkazano"][rec["source"]].append(rec["hit"])
+        for data in out.values():
+            windows = merge_intervals(iv for h in data["eps"] for iv in hit_intervals(h))
+            data["windows"] = [w.to_json() for w in windows]
+        return out
+
+def _fresh(snapshot: Snapshot, key: str) -> bool:
+    # stranica je stvarno preuzeta u ovom pokretanju (ne zastarela, ne greška)
+    if key in snapshot.stale or key in snapshot.errors:
+        return False
+    return not snapshot.hashes or key in snapshot.hashes
+
+def covered_dates(snapshot: Snapshot) -> Set[str]:
+    # datumi čije su EPS stranice stvarno preuzete u ovom pokretanju;
+    # ako stranica nije stigla, njena isključenja ne proglašavamo otkazanim
+    return {snapshot.eps_date(d) for d in snapshot.eps if _fresh(snapshot, f"eps:{d}")}
+
+def _kept(old: Record, today: str, dates: Set[str], bvk_fresh: bool) -> bool:
+    # zapis koji ovo pokretanje ne može ni da potvrdi ni da otkaže
+    if old["source"] == "bvk":
+        return not bvk_fresh
+    return old["date"] >= today and old["date"] not in dates
+
+class StateStore:
+    def __init__(self, name: str, directory: str = STATE_DIR):
+        self.path = os.path.join(directory, f"{name}.json")
+        self.reported: Dict[str, Record] = self._load()
+
+    def _load(self) -> Dict[str, Record]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                reported = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # ključevi i otisci se izvode iz zapisa, pa i stanje sačuvano sa
+        # starijim oblikom ključa ostaje upotrebljivo
+        return keyed(reported.values())
+
+    def diff(self, records: Dict[str, Record], snapshot: Snapshot) -> Diff:
+        today = datetime.now().strftime("%Y-%m-%d")
+        dates = covered_dates(snapshot)
+        d = Diff()
+        for key, rec in records.items():
+            old = self.reported.get(key)
+            if old is None:
+                d.added.append(rec)
+            elif old["fingerprint"] != rec["fingerprint"]:
+                d.changed.append(rec)
+        bvk_fresh = _fresh(snapshot, "bvk")
+        for key, old in self.reported.items():
+            if key in records:
+                continue
+            if old["source"] == "eps" and old["date"] < today:
+                continue
+            if _kept(old, today, dates, bvk_fresh):
+                continue
+            d.cancelled.append(old)
+        return d
+
+    def commit(self, records: Dict[str, Record], snapshot: Snapshot) -> None:
+        # zadržavamo i zapise za datume/izvore koji nisu preuzeti (da ih ne
+        # prijavimo ponovo), a prošle datume brišemo
+        today = datetime.now().strftime("%Y-%m-%d")
+        dates = covered_dates(snapshot)
+        bvk_fresh = _fresh(snapshot, "bvk")
+        state = {k: v for k, v in self.reported.items() if _kept(v, today, dates, bvk_fresh)}
+        state.update(records)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self.reported = state
+        except OSError as e:
+            print(f"⚠️ Greška pri čuvanju stanja: {e}")
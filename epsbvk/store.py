@@ -0,0 +1,72 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+
+# ===== SNAPSHOT STORE =====
+# Parsirani sadržaj stranica ključan po SHA-256 heš-u tela i memoizovani
+# rezultati pretrage po (heš snapshota, heš liste ulica). Stranica koja
+# vrati 304 se ne parsira, a neizmenjen snapshot se ne pretražuje ponovo.
+STORE_DIR = os.getenv("EPS_STORE_DIR", os.path.join(".cache", "snapshots"))
+# zapisi koji nisu korišćeni ovoliko dana se brišu
+MAX_AGE_DAYS = 7
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def json_hash(obj: Any) -> str:
+    raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return content_hash(raw.encode("utf-8"))
+
+class SnapshotStore:
+    def __init__(self, directory: str = STORE_DIR):
+        self.directory = directory
+
+    def _path(self, kind: str, key: str) -> str:
+        return os.path.join(self.directory, kind, f"{key}.json.gz")
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        path = self._path(kind, key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, kind: str, key: str, value: Any) -> None:
+        path = self._path(kind, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Store greška ({kind}/{key[:12]}): {e}")
+
+    def prune(self, max_age_days: float = MAX_AGE_DAYS) -> None:
+        cutoff = time.time() - max_age_days * 86400
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+_default: Optional[SnapshotStore] = None
+
+def default_store() -> Optional[SnapshotStore]:
+    # prazan EPS_STORE_DIR isključuje store
+    global _default
+    if not STORE_DIR:
+        return None
+    if _default is None:
+        _default = SnapshotStore(STORE_DIR)
+        _default.prune()
+    return _default
@@ -0,0 +1,61 @@
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, NamedTuple
+
+# ===== VREMENSKI PROZORI =====
+# EPS "vreme" je tekst ("08:30 - 14:00", ponekad više prozora u jednom polju).
+# Parsira se u intervale sa pravim datetime vrednostima; u rezultatima se
+# čuvaju kao ISO stringovi da bi ostali JSON-serijalizabilni (store, stanje).
+_WINDOW = re.compile(r"(\d{1,2})[:.](\d{2})\s*[-–—]\s*(\d{1,2})[:.](\d{2})")
+
+class Interval(NamedTuple):
+    start: datetime
+    end: datetime
+
+    def to_json(self) -> List[str]:
+        return [self.start.isoformat(timespec="minutes"), self.end.isoformat(timespec="minutes")]
+
+    @classmethod
+    def from_json(cls, raw: Iterable[str]) -> "Interval":
+        start, end = raw
+        return cls(datetime.fromisoformat(start), datetime.fromisoformat(end))
+
+def parse_vreme(vreme: str, day: str) -> List[Interval]:
+    # day je "YYYY-MM-DD"; prozor koji prelazi ponoć završava se sledećeg dana
+    try:
+        d = date.fromisoformat(day)
+    except ValueError:
+        return []
+    out = []
+    for h1, m1, h2, m2 in _WINDOW.findall(vreme):
+        try:
+            start = datetime.combine(d, time(int(h1), int(m1)))
+            # "24:00" je kraj dana
+            end = datetime.combine(d, time(int(h2) % 24, int(m2)))
+        except ValueError:
+            continue
+        if end <= start:
+            end += timedelta(days=1)
+        out.append(Interval(start, end))
+    return out
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    # preklopljeni i nadovezani prozori se spajaju
+    merged: List[Interval] = []
+    for iv in sorted(intervals):
+        if merged and iv.start <= merged[-1].end:
+            if iv.end > merged[-1].end:
+                merged[-1] = Interval(merged[-1].start, iv.end)
+        else:
+            merged.append(iv)
+    return merged
+
+def hit_intervals(hit: dict) -> List[Interval]:
+    # datetime intervali EPS pogotka (iz "windows" ili ponovnim parsiranjem)
+    if "windows" in hit:
+        return [Interval.from_json(w) for w in hit["windows"]]
+    return parse_vreme(hit.get("vreme", ""), hit.get("date", ""))
+
+def format_interval(iv: Interval) -> str:
+    end = iv.end.strftime("%H:%M" if iv.end.date() == iv.start.date() else "%d.%m. %H:%M")
+    return f"{iv.start.strftime('%H:%M')}–{end}"
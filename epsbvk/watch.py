@@ -0,0 +1,151 @@
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+from epsbvk.fetcher import Fetcher, Parser
+from epsbvk.metrics import METRICS
+from epsbvk.sources import (
+    BVK_URL, Snapshot, eps_pages, make_fetcher, not_published, parse_bvk_response, parse_eps_response,
+)
+
+# ===== WATCH REŽIM =====
+# Dugotrajni proces: jedna topla sesija, podaci u memoriji i poseban
+# adaptivni interval po izvoru — brže kad se stranica menja, sporije
+# (uz jitter) kad miruje. Provera se pokreće samo kad se nešto promeni.
+MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", "300"))
+MAX_INTERVAL = float(os.getenv("WATCH_MAX_INTERVAL", "3600"))
+START_INTERVAL = float(os.getenv("WATCH_START_INTERVAL", "900"))
+JITTER = 0.1
+SPEEDUP = 0.5     # množilac intervala posle promene
+SLOWDOWN = 1.5    # množilac intervala kad je stranica ista ili nedostupna
+
+@dataclass
+class PolledSource:
+    key: str
+    url: str
+    parse: Parser
+    interval: float
+    next_at: float = 0.0
+    digest: Optional[str] = None
+    data: Any = None
+    # poslednje preuzimanje nije uspelo (podaci su od ranije, ako ih ima)
+    error: Optional[str] = None
+    # stranica vraća 404 — još nije objavljena
+    missing: bool = False
+    # kada je sadržaj poslednji put potvrđen (unix vreme)
+    checked_at: float = 0.0
+    # dan poslednjeg uspešnog preuzimanja; EPS stranica "Dan_N" važi samo tog dana
+    fetched_on: Optional[date] = None
+
+class Watcher:
+    def __init__(self, on_change: Callable[[Snapshot], None],
+                 eps_urls: Optional[Dict[str, str]] = None, bvk_url: str = BVK_URL,
+                 fetcher: Optional[Fetcher] = None,
+                 min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL):
+        self.on_change = on_change
+        self.eps_urls = dict(eps_pages() if eps_urls is None else eps_urls)
+        self.bvk_url = bvk_url
+        self.fetcher = fetcher or make_fetcher()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        start = min(max(START_INTERVAL, min_interval), max_interval)
+        self.sources = [PolledSource(f"eps:{day}", url, parse_eps_response, start)
+                        for day, url in self.eps_urls.items()]
+        self.sources.append(PolledSource("bvk", bvk_url, parse_bvk_response, start))
+
+    def _reschedule(self, src: PolledSource, factor: float) -> None:
+        src.interval = min(max(src.interval * factor, self.min_interval), self.max_interval)
+        jitter = random.uniform(-JITTER, JITTER) * src.interval
+        src.next_at = time.monotonic() + src.interval + jitter
+
+    def snapshot(self) -> Snapshot:
+        # kao take_snapshot(): neobjavljene stranice se preskaču, a izvor bez
+        # podataka ide u errors, pa ga stanje ne tumači kao "nema isključenja"
+        snap = Snapshot(bvk_url=self.bvk_url)
+        today = snap.fetched_at.date()
+        for src in self.sources:
+            if src.missing:
+                continue
+            # juče preuzeta EPS stranica bi dobila današnji datum — ne koristi se
+            outdated = src.key != "bvk" and src.fetched_on is not None and src.fetched_on != today
+            if src.data is None or outdated:
+                snap.errors[src.key] = (f"poslednji podaci od {src.fetched_on:%d.%m.}" if outdated
+                                        else src.error or "izvor još nije preuzet")
+                if src.key != "bvk":
+                    day = src.key.split(":", 1)[1]
+                    snap.eps_urls[day], snap.eps[day] = src.url, []
+                continue
+            if src.key == "bvk":
+                snap.bvk = src.data
+            else:
+                day = src.key.split(":", 1)[1]
+                snap.eps_urls[day] = src.url
+                snap.eps[day] = [tuple(r) for r in src.data]
+            snap.hashes[src.key] = src.digest
+            if src.error is not None:
+                snap.stale[src.key] = src.checked_at
+        return snap
+
+    def poll_once(self) -> bool:
+        # preuzima izvore kojima je isteklo vreme; True ako se nešto promenilo
+        now = time.monotonic()
+        # posle ponoći se EPS stranice preuzimaju odmah, pre bilo koje provere
+        today = date.today()
+        for src in self.sources:
+            if src.key != "bvk" and src.fetched_on is not None and src.fetched_on != today:
+                src.next_at = now
+        due = [src for src in self.sources if src.next_at <= now]
+        if not due:
+            return False
+
+        # watch drži poslednje podatke u memoriji, pa mu zastareli iz keša ne trebaju
+        results = self.fetcher.fetch_all({src.key: (src.url, src.parse) for src in due}, stale=False)
+        changed = False
+        for src in due:
+            res = results[src.key]
+            if src.key != "bvk" and not_published(res):
+                changed = changed or not src.missing
+                src.missing, src.error, src.digest, src.data = True, None, None, None
+                self._reschedule(src, SLOWDOWN)
+                continue
+            src.missing = False
+            if isinstance(res, BaseException):
+                print(f"⚠️ {src.key} greška: {res}")
+                src.error = str(res)
+                self._reschedule(src, SLOWDOWN)
+                continue
+            src.error, src.checked_at, src.fetched_on = None, res.checked_at or time.time(), today
+            digest, data = res.digest, res.data
+            if digest != src.digest:
+                src.digest, src.data = digest, data
+                changed = True
+                self._reschedule(src, SPEEDUP)
+            else:
+                self._reschedule(src, SLOWDOWN)
+        return changed
+
+    def run(self) -> None:
+        print(f"👀 Watch režim: {len(self.sources)} izvora, interval {self.min_interval:.0f}–{self.max_interval:.0f}s")
+        try:
+            while True:
+                if self.poll_once():
+                    try:
+                        self.on_change(self.snapshot())
+                    except Exception as e:
+                        # greška u proveri ne sme da obori dugotrajni proces
+                        print(f"⚠️ Greška u proveri: {e}")
+                # metrike ciklusa bez promene (samo preuzimanja) ne čekaju sledeću proveru
+                METRICS.flush()
+                wake = min(src.next_at for src in self.sources)
+                time.sleep(max(wake - time.monotonic(), 1.0))
+        except KeyboardInterrupt:
+            print("👋 Watch režim zaustavljen.")
+        finally:
+            self.fetcher.close()
+
+def watch(on_change: Callable[[Snapshot], None], **kwargs) -> None:
+    Watcher(on_change, **kwargs).run()